@@ -0,0 +1,61 @@
+"""
+Benchmark the cost of atomic writes compared to plain in-place writes.
+
+Writes N small pickled files with each strategy into a temporary directory
+and reports the time per file.
+
+Usage: python dev/benchmarks/bench_atomic_write.py [count] [size_bytes]
+"""
+
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from core.utils.file_utils import atomic_batch, atomic_open, write_file  # noqa: E402
+
+
+def plain_write(file_path, data):
+    """The write_file implementation before atomic writes"""
+    with open(file_path, 'wb') as f:
+        f.truncate(0)
+        pickle.dump(data, f)
+
+
+def atomic_no_dir_sync(file_path, data):
+    with atomic_open(file_path, fsync_dir=False) as f:
+        pickle.dump(data, f)
+
+
+def run(label, directory, count, data, writer, batched=False):
+    paths = [os.path.join(directory, f"{label}_{i}.dat") for i in range(count)]
+    start = time.perf_counter()
+    if batched:
+        with atomic_batch():
+            for path in paths:
+                writer(path, data)
+    else:
+        for path in paths:
+            writer(path, data)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {elapsed * 1000:10.1f} ms total {elapsed / count * 1e6:10.1f} us/file")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 4096
+    data = {"payload": os.urandom(size)}
+
+    print(f"Writing {count} files of ~{size} bytes each")
+    with tempfile.TemporaryDirectory() as directory:
+        run("plain (not atomic)", directory, count, data, plain_write)
+        run("atomic, no dir fsync", directory, count, data, atomic_no_dir_sync)
+        run("atomic", directory, count, data, write_file)
+        run("atomic, batched", directory, count, data, write_file, batched=True)
+
+
+if __name__ == "__main__":
+    main()
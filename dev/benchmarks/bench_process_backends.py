@@ -0,0 +1,77 @@
+"""
+Benchmark the process enumeration backends of the process scanner.
+
+Builds a synthetic /proc tree with N processes in a temporary directory and
+enumerates it with each backend: listing the PIDs and inspecting every process,
+as a full scan does, then listing the PIDs only, then listing them and reading
+their start times, as the sweep for reused PIDs every REUSE_SWEEP_SCANS scans does.
+psutil is pointed at the synthetic tree through psutil.PROCFS_PATH.
+
+Usage: python dev/benchmarks/bench_process_backends.py [processes] [rounds]
+
+Results with 2000 processes, 10 rounds, psutil 7.2.2, Python 3.11, 1 CPU:
+    psutil full scan     ~150 ms    /proc full scan     ~20 ms
+    psutil pids only     ~1.7 ms    /proc pids only     ~2.0 ms
+    psutil start times    ~61 ms    /proc start times   ~15 ms
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+import psutil  # type: ignore  # noqa: E402
+
+from core.logic.process_scanner import ProcfsBackend, PsutilBackend  # noqa: E402
+
+NAMES = ["bash", "firefox", "Isolated Web Co", "code", "kworker/0:1-events", "python3", "gnome-shell"]
+
+
+def build_proc(root, count):
+    """Write a /proc tree with stat, cmdline and status files for count processes"""
+    with open(os.path.join(root, "stat"), "w") as f:
+        f.write("cpu  1 2 3 4 5 6 7 0 0 0\nbtime 1700000000\n")
+    for pid in range(1, count + 1):
+        name = NAMES[pid % len(NAMES)]
+        directory = os.path.join(root, str(pid))
+        os.mkdir(directory)
+        with open(os.path.join(directory, "stat"), "w") as f:
+            f.write(f"{pid} ({name}) S 1 {pid} {pid} 0 -1 4194560 1000 0 0 0 10 5 0 0 20 0 1 0 "
+                    f"{1000 + pid} 10000000 1000 18446744073709551615 1 1 0 0 0 0 0 4096 0 0 0 0 17 0 0 0 0 0 0\n")
+        with open(os.path.join(directory, "cmdline"), "wb") as f:
+            f.write(f"/usr/bin/{name}\0--flag\0".encode())
+        with open(os.path.join(directory, "status"), "w") as f:
+            f.write(f"Name:\t{name}\nState:\tS (sleeping)\nPid:\t{pid}\nPPid:\t1\nUid:\t0\t0\t0\t0\n")
+
+
+def run(label, rounds, count, fn):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"{label:<28} {elapsed * 1000:9.2f} ms/scan {elapsed / count * 1e6:8.2f} us/process")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    with tempfile.TemporaryDirectory() as root:
+        build_proc(root, count)
+        print(f"Synthetic /proc with {count} processes, {rounds} rounds")
+
+        psutil.PROCFS_PATH = root
+        backends = [("psutil", PsutilBackend()), ("/proc", ProcfsBackend(root))]
+
+        for label, backend in backends:
+            run(f"{label} full scan", rounds, count, lambda b=backend: b.inspect(b.pids()))
+        for label, backend in backends:
+            run(f"{label} pids only", rounds, count, backend.pids)
+        for label, backend in backends:
+            run(f"{label} start times", rounds, count, lambda b=backend: b.create_times(b.pids()))
+
+
+if __name__ == "__main__":
+    main()
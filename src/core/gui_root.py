@@ -23,10 +23,13 @@ from .screens.save_window import SaveWindow
 from .screens.create_session_window import CreateSessionWindow
 from .screens.session_total_window import SessionTotalWindow
 from .screens.settings_window import SettingsWindow
+from .screens.background_sessions_window import BackgroundSessionsWindow
 
 import logging
 logger = logging.getLogger(__name__)
 
+SESSION_CHANGES_INTERVAL_MS = 500
+
 
 class GUIRoot(tk.Frame):
     def __init__(self, parent):
@@ -75,6 +78,9 @@ class GUIRoot(tk.Frame):
 
         self.parent.protocol("WM_DELETE_WINDOW", self.on_close)
 
+        # Apply session file changes reported by the session watcher
+        self.after(SESSION_CHANGES_INTERVAL_MS, self.dispatch_session_changes)
+
     def setup_options(self):
         """Configure Options (About, License, etc.). Uses a Tk Menu for cross-platform behaviour.
            On macOS we also register the platform hooks so items appear in the native App menu."""
@@ -206,7 +212,8 @@ class GUIRoot(tk.Frame):
     def init_screens(self):
         """Pass the logic_controller when initializing screens"""
         for F in (MainWindow, SessionsWindow, ProjectSessionsWindow, ProjectsWindow, CreateProjectWindow,
-                  SelectAppWindow, TrackerWindow, SaveWindow, CreateSessionWindow, SessionTotalWindow, SettingsWindow):
+                  SelectAppWindow, TrackerWindow, SaveWindow, CreateSessionWindow, SessionTotalWindow, SettingsWindow,
+                  BackgroundSessionsWindow):
             page_name = F.__name__
             frame = F(parent=self.container, controller=self, logic_controller=self.logic)
             self.frames[page_name] = frame
@@ -217,6 +224,9 @@ class GUIRoot(tk.Frame):
         frame = self.frames[page_name]
         frame.tkraise()
 
+        # Keep the app list fresh while it is shown
+        self.logic.app_tracker.set_fast_polling(page_name == "SelectAppWindow")
+
         # Check if the page is already the current page
         if self.history and self.history[self.history_index] == page_name:
             return  # Do nothing if the page is already the current page
@@ -238,6 +248,9 @@ class GUIRoot(tk.Frame):
         # Special handling for CreateSessionWindow - check for pre-selected project
         elif page_name == "CreateSessionWindow":
             frame.check_pre_selected_project()
+        # Special handling for BackgroundSessionsWindow - keep the list current while shown
+        elif page_name == "BackgroundSessionsWindow":
+            frame.refresh()
 
         # Ensure navigation buttons are updated after any special handling
         self.update_nav_buttons()
@@ -273,6 +286,21 @@ class GUIRoot(tk.Frame):
         self.back_button.config(state="disabled")
         self.forward_button.config(state="disabled")
 
+    def dispatch_session_changes(self):
+        """Update the catalog and the session and project lists with the session
+        files changed since the last call. Runs on the Tk thread"""
+        try:
+            changes = self.logic.session_watcher.drain()
+            if changes:
+                updated = self.logic.file_handler.apply_session_changes(changes)
+                self.frames["SessionsWindow"].refresh_sessions(updated)
+                self.frames["ProjectSessionsWindow"].refresh_sessions(updated)
+                self.frames["ProjectsWindow"].refresh_projects()
+        except Exception:
+            from traceback import format_exc
+            logger.error("Could not apply session changes:\n\n" + format_exc())
+        self.after(SESSION_CHANGES_INTERVAL_MS, self.dispatch_session_changes)
+
     def reset_frames(self):
         try:
             # Preserve selected project before reset
@@ -285,9 +313,18 @@ class GUIRoot(tk.Frame):
             if self.logic.time_tracker:
                 self.logic.time_tracker.reset()
 
+            if self.logic.checkpointer:
+                self.logic.checkpointer.stop(clear=True)
+
             if self.logic.mouse_tracker:
                 self.logic.mouse_tracker.stop()
 
+            if self.logic.resource_sampler:
+                self.logic.resource_sampler.reset()
+
+            if self.logic.focus_tracker:
+                self.logic.focus_tracker.stop()
+
             # Stop GUI threads
             self.frames["TrackerWindow"].stop_threads()
             self.frames["SessionTotalWindow"].stop_threads(wait=False)
@@ -328,9 +365,37 @@ class GUIRoot(tk.Frame):
         if self.logic.time_tracker:
             self.logic.time_tracker.stop()
 
+        # Checkpoint a session that was not saved, it is offered for recovery on the next launch
+        if self.logic.checkpointer:
+            self.logic.checkpointer.stop()
+
         # stop the MouseTracker thread
         if self.logic.mouse_tracker:
             self.logic.mouse_tracker.stop()
 
+        # stop sampling the resource usage of the tracked app
+        if self.logic.resource_sampler:
+            self.logic.resource_sampler.stop()
+
+        # stop following the focus of the tracked app
+        if self.logic.focus_tracker:
+            self.logic.focus_tracker.stop()
+
+        # Write the usage recorded in the background
+        if self.logic.usage_recorder:
+            self.logic.usage_recorder.stop()
+
+        # Save the background sessions of the tracking engine
+        if self.logic.tracking_engine:
+            self.logic.tracking_engine.stop()
+
+        # Stop watching session files
+        if self.logic.session_watcher:
+            self.logic.session_watcher.stop()
+
+        # Stop the session scrub and remember verified sessions
+        if self.logic.file_handler:
+            self.logic.file_handler.close()
+
         # Destroy the root window
         self.parent.destroy()
@@ -5,6 +5,7 @@ App Tracking logic class. Used for app tracking, filtering, and listing.
 import os
 import sys
 import threading
+import time
 
 import psutil  # type: ignore
 
@@ -21,15 +22,98 @@ from core.utils.file_utils import (
     user_dir_exists,
     write_file,
 )
+from core.logic.exit_waiter import ExitWaiter
+from core.logic.process_scanner import ProcessScanner
 
 logger = logging.getLogger(__name__)
 
-EXCLUDED_APP_PIDS = []
-INCLUDED_APP_PIDS = []
+# The scan interval halves, down to MIN_POLL_SECONDS, after each scan in which
+# processes started or exited, and doubles up to the max_poll_interval setting
+# after each scan in which none did
+MIN_POLL_SECONDS = 0.25
+DEFAULT_MAX_POLL_SECONDS = 8
 
-if user_dir_exists() and os.path.exists(apps_file()):
-    EXCLUDED_APP_PIDS = read_file(apps_file())["excluded_app_pids"]
-    INCLUDED_APP_PIDS = read_file(apps_file())["included_app_pids"]
+# Classifications of processes not seen for this long are forgotten
+CLASSIFICATION_MAX_AGE = 7 * 24 * 3600
+MAX_CLASSIFICATIONS = 4096
+
+
+def _process_key(pid, create_time):
+    """A process is identified by its PID and start time, so a reused PID (after a
+    reboot or a wraparound) is a different process. Start times are rounded to the
+    clock tick resolution, as the scanner backends compute them slightly differently"""
+    return pid, round(create_time, 2)
+
+
+class _Classifications:
+    """Whether processes have a GUI, so each process is only classified once.
+    Entries are (pid, create_time) -> (exe, has_gui, last_seen): a process that
+    exec()s another program keeps its key but changes exe, and is classified again.
+    Entries age out when their process has not been seen for CLASSIFICATION_MAX_AGE,
+    and the oldest are evicted beyond MAX_CLASSIFICATIONS. Persisted in apps_file()"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.excluded = set()  # keys classified without a GUI
+
+    def load(self):
+        try:
+            entries = read_file(apps_file())["classifications"]
+        except (FileNotFoundError, KeyError):
+            return  # Missing, or PID lists written by an older version
+        except Exception as e:
+            logger.warning(f"Could not read apps file: {e}")
+            return
+        with self.lock:
+            self.entries = entries
+            self.excluded = {key for key, (_, has_gui, _) in entries.items() if not has_gui}
+        self._evict()
+
+    def is_excluded(self, pid, create_time):
+        return _process_key(pid, create_time) in self.excluded
+
+    def lookup(self, key, exe):
+        """Returns whether the process has a GUI, or None if it must be classified"""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != exe:
+                return None
+            self.entries[key] = (exe, entry[1], time.time())
+        return entry[1]
+
+    def record(self, key, exe, has_gui):
+        with self.lock:
+            self.entries[key] = (exe, has_gui, time.time())
+            if has_gui:
+                self.excluded.discard(key)
+            else:
+                self.excluded.add(key)
+
+    def _evict(self):
+        with self.lock:
+            cutoff = time.time() - CLASSIFICATION_MAX_AGE
+            stale = [key for key, (_, _, last_seen) in self.entries.items() if last_seen < cutoff]
+            overflow = len(self.entries) - len(stale) - MAX_CLASSIFICATIONS
+            if overflow > 0:
+                fresh = sorted((entry[2], key) for key, entry in self.entries.items() if entry[2] >= cutoff)
+                stale += [key for _, key in fresh[:overflow]]
+            for key in stale:
+                del self.entries[key]
+                self.excluded.discard(key)
+
+    def save(self):
+        self._evict()
+        with self.lock:
+            data = {"classifications": dict(self.entries)}
+        try:
+            write_file(apps_file(), data)
+        except OSError as e:
+            logger.warning(f"Could not write apps file: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.entries = {}
+            self.excluded = set()
 
 
 class AppTracker:
@@ -38,7 +122,19 @@ class AppTracker:
         self.selected_app = None
         self.update_thread = None
         self.stop_event = threading.Event()  # Used to stop the thread gracefully
-        self.cached_process_count = 0  # Tracks the last known process count
+        self.wake_event = threading.Event()  # Cuts the current poll interval short
+        self.scan_lock = threading.Lock()
+        self.fast_polling = False
+        self.poll_interval = MIN_POLL_SECONDS
+        self.scan_stats = {"scans": 0, "wakeups": 0, "scan_seconds": 0.0}
+        try:
+            self.max_poll_interval = read_file(config_file())["max_poll_interval"]
+        except (KeyError, FileNotFoundError):
+            self.max_poll_interval = DEFAULT_MAX_POLL_SECONDS
+        self.classifications = _Classifications()
+        if user_dir_exists():
+            self.classifications.load()
+        self.scanner = ProcessScanner(self.classifications.is_excluded)
         try:
             self.is_filter_enabled = read_file(config_file())["is_filter_enabled"]
         except (KeyError, FileNotFoundError):
@@ -59,44 +155,89 @@ class AppTracker:
             )
             self.update_thread.start()
 
-    def _fetch_app_names(self):
-        apps = []
-        seen_names = ["AppUsageGUI", "Python", "Python3"]
+    def _scan(self):
+        """Scan for started and exited processes, counting the scan and its time.
+        Must be called holding scan_lock"""
+        start = time.perf_counter()
+        if self.scanner.scan():
+            # Publish a new list, readers may hold the previous one
+            self.app_names = list(self.scanner.app_names)
+        self.scan_stats["scans"] += 1
+        self.scan_stats["scan_seconds"] += time.perf_counter() - start
 
-        for process in psutil.process_iter(["pid", "name"]):
-            try:
-                pid = process.info["pid"]
-                app_name = process.info["name"]
-                app_name = app_name.split(".")[0]  # Use the base name of the process
-                if (
-                    app_name not in seen_names
-                    and pid not in EXCLUDED_APP_PIDS
-                    and len(app_name) > 0
-                ):
-                    apps.append(app_name)
-                    seen_names.append(app_name)
-                    if app_name == self.selected_app:
-                        logger.debug(f"Seleced App found: {app_name}")
-                        break
-                    # print(app_name)  # Debugging line to help optimize
-            except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
-                # Skip processes that terminate mid-iteration or are inaccessible
-                pass
-        if os.name == "nt":
-            return sorted(apps, key=str.casefold)
-        return sorted(apps)
+    def _fetch_app_names(self):
+        """Rescan every process, e.g. after the excluded PIDs changed"""
+        with self.scan_lock:
+            self.scanner.reset()
+            self._scan()
+            return list(self.scanner.app_names)
 
     def _monitor_processes(self):
-        """keeps track of the number of processes"""
+        """Keeps the app names up to date, inspecting only new processes. Polls
+        at the fastest rate while the app list is shown. Otherwise the interval
+        shrinks one step per scan with process churn and grows one step per scan
+        without, so a single short-lived process does not undo the backoff"""
         while not self.stop_event.is_set():
-            current_process_count = len(psutil.pids())
-            if current_process_count != self.cached_process_count:
-                # Process count has changed; update app names
-                self.cached_process_count = current_process_count
-                self.app_names = self._fetch_app_names()
-            self.stop_event.wait(
-                timeout=1
-            )  # Check periodically to avoid excessive CPU usage
+            self.scan_stats["wakeups"] += 1
+            # Cleared before scanning, so a wake requested meanwhile is not lost
+            self.wake_event.clear()
+            with self.scan_lock:
+                self._scan()
+                churn = self.scanner.churn
+            if self.fast_polling:
+                self.poll_interval = MIN_POLL_SECONDS
+            elif churn:
+                self.poll_interval = max(self.poll_interval / 2, MIN_POLL_SECONDS)
+            else:
+                self.poll_interval = self.poll_interval * 2
+            self.poll_interval = min(self.poll_interval, self.max_poll_interval)
+            self.wake_event.wait(timeout=self.poll_interval)
+
+    def set_fast_polling(self, enabled):
+        """Poll at the fastest rate while enabled, e.g. while the app list is shown"""
+        was_fast = self.fast_polling
+        self.fast_polling = enabled
+        if enabled and not was_fast:
+            self.wake_event.set()
+
+    def set_max_poll_interval(self, seconds):
+        self.max_poll_interval = seconds
+        self.wake_event.set()  # a shorter interval applies right away
+
+    def get_scan_stats(self):
+        """Scans, monitor thread wakeups and seconds spent scanning since startup"""
+        return dict(self.scan_stats, poll_interval=self.poll_interval)
+
+    def get_app_pids(self, app_name):
+        """PIDs of an app and all the processes it spawned, so multi-process apps
+        (browsers, Electron apps, IDEs) are tracked as one. The tree is checked for
+        reused PIDs on every scan from now on"""
+        return self.get_app_trees([app_name])[app_name]
+
+    def get_app_trees(self, app_names):
+        """{app name: PIDs of its process tree} for several apps, all resolved from
+        one scan, e.g. for the sessions of the tracking engine"""
+        with self.scan_lock:
+            self._scan()
+            trees = {}
+            for app_name in app_names:
+                tree = self.scanner.app_tree(app_name)
+                # Scans only sweep for reused PIDs now and then, check the tree now
+                if self.scanner.verify(tree):
+                    self.app_names = list(self.scanner.app_names)
+                    tree = self.scanner.app_tree(app_name)
+                self.scanner.watch(app_name, tree)
+                trees[app_name] = tree
+            return trees
+
+    def get_app_of_pid(self, pid):
+        """The app a process belongs to as of the last scan, None if unknown"""
+        with self.scan_lock:
+            return self.scanner.app_of(pid)
+
+    def exit_waiter(self, app_name):
+        """Resolve an app to its process tree, to wait for all of it to exit"""
+        return ExitWaiter(self.get_app_pids(app_name))
 
     def get_app_names(self):
         return self.app_names
@@ -109,15 +250,22 @@ class AppTracker:
 
     def stop(self):
         self.stop_event.set()
+        self.wake_event.set()
         if self.update_thread is not None:
             try:
                 self.update_thread.join()
                 logging.info("App tracker stopped.")
             except RuntimeError:
                 pass
+        stats = self.scan_stats
+        logger.info(
+            f"Process scans: {stats['scans']}, wakeups: {stats['wakeups']}, "
+            f"time spent: {stats['scan_seconds']:.3f}s"
+        )
 
     def start(self):
         self.stop_event = threading.Event()
+        self.wake_event.clear()
         self._start_tracking()
 
     def reset(self):
@@ -136,10 +284,7 @@ class AppTracker:
         logger.info(
             f"Resetting excluded PIDs (refresh={refresh}, update_pids={update_pids})"
         )
-        global EXCLUDED_APP_PIDS
-        global INCLUDED_APP_PIDS
-        EXCLUDED_APP_PIDS = []
-        INCLUDED_APP_PIDS = []
+        self.classifications.clear()
         if refresh:
             self.app_names = self._fetch_app_names()
         if update_pids:
@@ -150,39 +295,35 @@ class AppTracker:
             # If filtering is disabled, clear the lists and return
             self._reset_excluded_pids(False, False)
             return
-        seen_pids = []
+        classified = 0
         i = 0
-        for process in psutil.process_iter(["pid", "status"]):
+        for process in psutil.process_iter(["pid", "status", "create_time", "exe"]):
             try:
+                if process.info["status"] != psutil.STATUS_RUNNING or process.info["create_time"] is None:
+                    continue
                 pid = process.info["pid"]
-                if pid in seen_pids:
+                key = _process_key(pid, process.info["create_time"])
+                exe = process.info["exe"]
+                if self.classifications.lookup(key, exe) is not None:
                     continue
                 # print(f"Checking process: (PID: {pid})")  # Debugging line
-                seen_pids.append(pid)
-                if (
-                    process.info["status"] == psutil.STATUS_RUNNING
-                    and pid not in INCLUDED_APP_PIDS
-                    and pid not in EXCLUDED_APP_PIDS
-                ):
-                    if self._has_gui(pid):
-                        INCLUDED_APP_PIDS.append(pid)
-                    else:
-                        i += 1
-                        EXCLUDED_APP_PIDS.append(pid)
-                if len(seen_pids) > (400 if os.name == "nt" else 10000):
-                    # Limit the number of seen processes to avoid long loading times
+                has_gui = bool(self._has_gui(pid))
+                self.classifications.record(key, exe, has_gui)
+                classified += 1
+                if not has_gui:
+                    i += 1
+                if classified > (400 if os.name == "nt" else 10000):
+                    # Limit the number of classified processes to avoid long loading times
                     break
             except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
                 # Skip processes that terminate mid-iteration or are inaccessible
                 pass
 
-        # logger.info(f"Excluded app PIDs: {EXCLUDED_APP_PIDS}")  # Debugging line
-        logger.info(f"New exclusions: {i}")
-        data = {
-            "excluded_app_pids": EXCLUDED_APP_PIDS,
-            "included_app_pids": INCLUDED_APP_PIDS,
-        }
-        write_file(apps_file(), data)
+        logger.info(f"Classified processes: {classified}, new exclusions: {i}")
+        if i and self.scanner.processes:
+            # Drop the newly excluded processes from the app names
+            self.app_names = self._fetch_app_names()
+        self.classifications.save()
 
     def _has_gui(self, process_id):
         if os.name == "nt":
@@ -0,0 +1,185 @@
+"""
+Checkpoints the session being tracked, so a crash or power loss loses at most one
+checkpoint interval. The start, stop and pause events are already written to the
+session's capture journal as they happen, so a checkpoint only holds what the
+journal does not: which session is tracked, its time so far and whether it is
+paused. The small recovery file is rewritten atomically, and only when one of
+those changed. It is removed once the session is saved or discarded; if it is
+still there on the next launch, the session can be restored from it.
+"""
+
+import os
+import threading
+import time
+
+from core.utils.file_utils import (
+    PAUSE_MANUAL,
+    apply_journal,
+    config_file,
+    read_file,
+    read_journal,
+    read_session,
+    recovery_file,
+    session_directory,
+    write_file,
+)
+from _version import __version__
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+def read_checkpoint():
+    """The checkpoint left behind by a session that was never saved, or None"""
+    try:
+        return read_file(recovery_file())
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable session checkpoint: {e}")
+        return None
+
+
+class Checkpointer:
+    def __init__(self, parent, logic_controller):
+        self.parent = parent
+        self.logic = logic_controller
+        self.stop_event = threading.Event()
+        self.update_thread = None
+        self.lock = threading.Lock()
+        self.active = False  # a run is tracked that has not been saved or discarded
+        self.last_state = None
+        try:
+            self.interval = read_file(config_file())["checkpoint_interval"]
+        except (FileNotFoundError, KeyError):
+            self.interval = 30  # Default value
+
+    def start(self):
+        """Checkpoint the tracked session now and every interval until stopped, so a
+        crash within the first interval can still be recovered"""
+        self.active = True
+        self.checkpoint()
+        if self.update_thread is None:
+            self.stop_event.clear()
+            self.update_thread = threading.Thread(target=self._run, name="checkpointer", daemon=True)
+            self.update_thread.start()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write a checkpoint of the tracked session if its state changed"""
+        time_tracker = self.logic.time_tracker
+        file_handler = self.logic.file_handler
+        if not self.active or time_tracker.start_time is None or not file_handler.get_file_name():
+            return
+        continuing = file_handler.get_continuing_session()
+        session_version = ".".join(__version__.split(".")[:2])
+        if continuing:
+            session_version = (file_handler.get_data() or {}).get("session_version", "1.0")
+        checkpoint = {
+            "file_name": file_handler.get_file_name(),
+            "project_name": file_handler.get_current_project(),
+            "continuing": continuing,
+            "app_name": self.logic.app_tracker.get_selected_app(),
+            "session_version": session_version,
+            "time_spent": time_tracker.get_total_time(),
+            "paused_time": time_tracker.get_paused_time() if time_tracker.get_is_paused() else None,
+            "pause_reason": time_tracker.get_pause_reason(),
+            "journal_base": file_handler.get_journal_base(),
+        }
+        state = (round(checkpoint["time_spent"]), checkpoint["paused_time"], checkpoint["file_name"])
+        with self.lock:
+            if not self.active or state == self.last_state:
+                return
+            checkpoint["checkpoint_time"] = time.time()
+            try:
+                write_file(recovery_file(), checkpoint)
+                self.last_state = state
+            except OSError as e:
+                logger.warning(f"Could not checkpoint session: {e}")
+
+    def set_interval(self, seconds):
+        self.interval = seconds
+
+    def stop(self, clear=False):
+        """Stop checkpointing. With clear, the session was saved or discarded and its
+        checkpoint is removed, otherwise a last checkpoint is written"""
+        self.stop_event.set()
+        if self.update_thread is not None:
+            self.update_thread.join(timeout=1)
+            self.update_thread = None
+        if clear:
+            self.clear()
+        else:
+            self.checkpoint()
+
+    def clear(self):
+        with self.lock:
+            self.active = False
+            self.last_state = None
+            try:
+                os.remove(recovery_file())
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Could not remove session checkpoint: {e}")
+
+    def restore(self, checkpoint):
+        """Save the session of a checkpoint: its saved data, if it was continued, the
+        events in its capture journal and the time tracked up to the checkpoint"""
+        file_name = checkpoint["file_name"]
+        project_name = checkpoint["project_name"]
+        directory = session_directory(project_name)
+        data = None
+        if checkpoint["continuing"] and os.path.exists(os.path.join(directory, file_name + ".dat")):
+            data, error = read_session(directory, file_name)
+            if error is not None:
+                raise ValueError(f"Session {file_name} cannot be restored: {error}")
+        if data is None:
+            try:
+                config = read_file(config_file())
+            except FileNotFoundError:
+                config = {}
+            data = apply_journal(
+                {
+                    "app_name": checkpoint["app_name"],
+                    "session_version": checkpoint["session_version"],
+                    "config": config,
+                    "time_captures": {"starts": [], "stops": [], "pauses": []},
+                },
+                read_journal(os.path.join(directory, file_name + ".journal")),
+            )
+        captures = data["time_captures"]
+        end = checkpoint["checkpoint_time"]
+        paused_time = checkpoint["paused_time"]
+        if paused_time is not None and all(pause["start"] != paused_time for pause in captures["pauses"]):
+            # Paused at the checkpoint and not resumed since, the pause ends with the run
+            captures["pauses"].append({
+                "start": paused_time,
+                "how_long": end - paused_time,
+                "reason": checkpoint.get("pause_reason", PAUSE_MANUAL),
+            })
+        if len(captures["stops"]) < len(captures["starts"]):
+            captures["stops"].append(end)
+        data["time_spent"] = checkpoint["time_spent"]
+        self.logic.file_handler.save_session_as(file_name, project_name, data)
+        self.clear()
+        logger.info(f"Restored session {file_name} from its checkpoint")
+
+    def discard(self, checkpoint):
+        """Drop a checkpoint and the capture events journaled during its run"""
+        journal_base = checkpoint.get("journal_base")
+        journal_path = os.path.join(
+            session_directory(checkpoint["project_name"]), checkpoint["file_name"] + ".journal"
+        )
+        try:
+            if journal_base is not None and os.path.exists(journal_path):
+                if journal_base == 0:
+                    os.remove(journal_path)
+                else:
+                    os.truncate(journal_path, journal_base)
+        except OSError as e:
+            logger.warning(f"Could not discard capture journal of {checkpoint['file_name']}: {e}")
+        self.clear()
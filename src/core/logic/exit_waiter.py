@@ -0,0 +1,76 @@
+"""
+Waits for the processes of a tracked app to exit without scanning the process list.
+On Linux each process is held through a pidfd, which becomes readable the moment
+the process exits. Elsewhere, or on kernels without pidfd_open, psutil.wait_procs
+is used.
+"""
+
+import os
+import select
+
+import psutil  # type: ignore
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class ExitWaiter:
+    def __init__(self, pids):
+        self.pids = set(pids)
+        self.poller = None
+        self.pidfds = {}  # pidfd -> pid
+        self.processes = []  # psutil fallback
+        if hasattr(os, "pidfd_open") and hasattr(select, "poll"):
+            try:
+                self._open_pidfds(pids)
+            except OSError as e:
+                logger.warning(f"pidfd_open unavailable, waiting with psutil instead: {e}")
+        if self.poller is None:
+            self._attach_processes(pids)
+
+    def _open_pidfds(self, pids):
+        poller = select.poll()
+        pidfds = {}
+        try:
+            for pid in pids:
+                try:
+                    fd = os.pidfd_open(pid)
+                except ProcessLookupError:
+                    continue  # exited since it was resolved
+                pidfds[fd] = pid
+                poller.register(fd, select.POLLIN)
+        except OSError:
+            for fd in pidfds:
+                os.close(fd)
+            raise
+        self.poller = poller
+        self.pidfds = pidfds
+
+    def _attach_processes(self, pids):
+        for pid in pids:
+            try:
+                self.processes.append(psutil.Process(pid))
+            except psutil.NoSuchProcess:
+                pass
+
+    def exited(self):
+        """Whether every process has exited"""
+        return not self.pidfds and not self.processes
+
+    def wait(self, timeout):
+        """Block until every process has exited or timeout seconds pass. Returns
+        True if they all exited"""
+        if self.pidfds:
+            for fd, _ in self.poller.poll(int(timeout * 1000)):
+                self.poller.unregister(fd)
+                os.close(fd)
+                logger.info(f"Tracked process {self.pidfds.pop(fd)} exited")
+        elif self.processes:
+            _, self.processes = psutil.wait_procs(self.processes, timeout=timeout)
+        return self.exited()
+
+    def close(self):
+        for fd in self.pidfds:
+            os.close(fd)
+        self.pidfds = {}
+        self.processes = []
@@ -1,23 +1,115 @@
-"""Handler for all file io operations. Only handles one session at a time, which should
-be set by other classes.
+"""Handler for all file io operations. Handles one current session at a time, which
+should be set by other classes; other sessions can only be saved by name.
 The file handler is responsible for saving and loading session data"""
 
-import _pickle
 import logging
+import multiprocessing
 import os
 import pickle
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 
 from core.utils.file_utils import (
-    compute_hash,
+    JOURNAL_RECORD,
+    JOURNAL_TOTAL,
+    RESOURCE_RECORD,
+    VERIFY_BACKGROUND,
+    VERIFY_FIRST_TOUCH,
+    append_journal,
+    append_resource_buckets,
+    config_file,
+    configure_session_verification,
+    decode_session,
+    discard_stale_sidecars,
     get_projects_directory,
     get_sessions_directory,
+    index_session,
+    is_legacy_session,
+    pack_journal_record,
     read_file,
-    write_file,
+    read_session_payload,
+    read_session_summary,
+    save_verified_sessions,
+    scrub_sessions,
+    session_directory,
+    summarize_session,
+    unindex_session,
+    write_session_file,
 )
+from core.logic.session_catalog import SessionCatalog
+from core.logic.session_watcher import RESCAN
 
 logger = logging.getLogger(__name__)
 
+# Continued sessions are saved to the capture journal until it holds this many
+# records, or their resource file this many buckets, then both are compacted into
+# the session file
+JOURNAL_COMPACT_RECORDS = 64
+RESOURCE_COMPACT_RECORDS = 720
+
+# Bulk loads and catalog rescans read sessions on at most this many threads.
+# When the caller only needs a small result from each session, payloads of at
+# least PROCESS_DECODE_BYTES are decoded in worker processes, so the decoded data
+# is not sent back. Starting the workers costs about as much as decoding 20 MiB
+# (see dev/benchmarks/bench_bulk_load.py), so they are only used for a load with
+# at least PROCESS_POOL_MIN_BYTES of such payloads, on more than one CPU
+LOAD_WORKERS = min(8, (os.cpu_count() or 1) + 4)
+PROCESS_DECODE_BYTES = 1 << 20
+PROCESS_POOL_MIN_BYTES = 64 << 20
+
+
+class SessionJournal:
+    """The capture journal of one session while it runs: the start, stop, pause and
+    focus events of the run are appended as they happen, so they survive a crash
+    before the session is saved"""
+    def __init__(self, file_name, project_name=None):
+        self.file_name = file_name
+        self.project_name = project_name
+        self.base = None  # journal size when the run started, None before its first event
+        self.generation = 0  # generation of the session file the journal adds to
+
+    def path(self, extension=".journal"):
+        return os.path.join(session_directory(self.project_name), self.file_name + extension)
+
+    def capture(self, kind, a, b=0.0):
+        """Append one event of the run"""
+        directory = session_directory(self.project_name)
+        journal_path = self.path()
+        try:
+            if not os.path.exists(directory):
+                os.makedirs(directory, exist_ok=True)
+            if self.base is None:
+                self.generation = discard_stale_sidecars(directory, self.file_name)
+                # Remember where this run starts, in case it is not saved
+                self.base = os.path.getsize(journal_path) if os.path.exists(journal_path) else 0
+            append_journal(journal_path, [pack_journal_record(kind, a, b)], self.generation)
+        except OSError as e:
+            logger.warning(f"Could not journal capture event of {self.file_name}: {e}")
+
+    def discard(self):
+        """Drop the events of a run that is not being saved"""
+        if self.base is None:
+            return
+        journal_path = self.path()
+        try:
+            if os.path.exists(journal_path):
+                if self.base == 0:
+                    os.remove(journal_path)
+                else:
+                    os.truncate(journal_path, self.base)
+        except OSError as e:
+            logger.warning(f"Could not discard capture journal of {self.file_name}: {e}")
+        self.base = None
+
+
+def _decode_and_reduce(directory, filename, payload, reducer):
+    """Worker process side of FileHandler.load_sessions()"""
+    data, error = decode_session(directory, filename, payload)
+    if error is not None:
+        return None, error
+    return reducer(data), None
+
 
 class FileHandler:
     def __init__(self, parent, logic_controller):
@@ -33,50 +125,197 @@ class FileHandler:
         self.continuing_tracker = False
         self.corrupt_sessions = []
         self.session_names = []
+        self.catalog = SessionCatalog()
+        self.journal = None  # SessionJournal of the running session
+        self.catalog_watched = False  # the session watcher keeps the catalog current
+
+        self.scrub_thread = None
+        self.scrub_stop = threading.Event()
+        try:
+            verification = read_file(config_file())["session_verification"]
+        except (FileNotFoundError, KeyError):
+            verification = VERIFY_FIRST_TOUCH  # Default value
+        try:
+            persist_verified = read_file(config_file())["persist_verified_sessions"]
+        except (FileNotFoundError, KeyError):
+            persist_verified = False  # Default value
+        self.set_verification_mode(verification, persist_verified)
+
+    def set_verification_mode(self, mode, persist):
+        """Choose when session checksums are verified, and start or stop the
+        background scrub accordingly"""
+        configure_session_verification(mode, persist)
+        if mode == VERIFY_BACKGROUND:
+            if self.scrub_thread is None or not self.scrub_thread.is_alive():
+                self.scrub_stop.clear()
+                self.scrub_thread = threading.Thread(target=self._scrub_sessions, name="session_scrub", daemon=True)
+                self.scrub_thread.start()
+        else:
+            self.scrub_stop.set()
+
+    def _scrub_sessions(self):
+        """Verify all session files in the background, so later loads skip the checksum"""
+        logger.info("Verifying session files in the background...")
+        failed = scrub_sessions(self.scrub_stop)
+        for filename, error in failed:
+            logger.warning(f"Session {filename} failed verification: {error}")
+        logger.info(f"Background session verification finished, {len(failed)} failed")
+
+    def close(self):
+        """Stop the background scrub and remember the verified sessions"""
+        self.scrub_stop.set()
+        save_verified_sessions()
 
     def save_session_data(self, data):
-        """Special function to save and hash session data"""
+        """Special function to save session data with its checksum"""
+        self.save_session_as(self.file_name, self.current_project, data)
+        self.data = data
+        self.journal = None
+
+    def save_session_as(self, file_name, project_name, data):
+        """Save the data of any session with its checksum, not only the current one,
+        e.g. one restored from a checkpoint. Compacts its capture journal away"""
         # Add project and timestamp information to data
-        if self.current_project:
-            data["project_name"] = self.current_project
+        if project_name:
+            data["project_name"] = project_name
         data["created_date"] = datetime.now().isoformat()
         data["last_modified"] = datetime.now().isoformat()
 
         logger.info("Saving session data...")
 
-        self.data = pickle.dumps(data)
-        logger.info(f"Data saved: {len(self.data)} bytes")
-
         # Determine save directory based on project
-        if self.current_project:
-            save_directory = os.path.join(
-                get_projects_directory(), self.current_project
-            )
-            if not os.path.exists(save_directory):
-                os.makedirs(save_directory, exist_ok=True)
-        else:
-            save_directory = self.directory
+        save_directory = session_directory(project_name)
+        if not os.path.exists(save_directory):
+            os.makedirs(save_directory, exist_ok=True)
 
-        file_path = os.path.join(save_directory, self.file_name + ".dat")
-        hash_path = os.path.join(save_directory, self.file_name + ".hash")
+        file_path = os.path.join(save_directory, file_name + ".dat")
+        hash_path = os.path.join(save_directory, file_name + ".hash")
 
-        # Save data to file
-        write_file(file_path, self.data)
+        journal_path = os.path.join(save_directory, file_name + ".journal")
+        resources_path = os.path.join(save_directory, file_name + ".resources")
+
+        previous = self.catalog.get(file_name, project_name)
+        overwriting = os.path.exists(file_path)
+
+        # Save data to file, the checksum is part of the v3 file header
+        size = write_session_file(file_path, data)
+        logger.info(f"Data saved: {size} bytes")
+
+        # A session rewritten from the old format no longer needs its hash file
+        if os.path.exists(hash_path):
+            os.remove(hash_path)
 
-        # Compute and save hash
-        data_hash = compute_hash(self.data)
-        write_file(hash_path, data_hash.encode("utf-8"))
+        # The journaled captures and resource buckets are part of the data now,
+        # compact their files away
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        if os.path.exists(resources_path):
+            os.remove(resources_path)
+
+        self._record_saved_session(file_name, project_name, data, file_path, previous, overwriting)
+
+    def save_session_incremental(self, data, resource_buckets=()):
+        """Save a continued session by journaling its new total next to the capture
+        events already journaled while it ran, and appending the resource usage
+        buckets sampled in this run to its resource file, instead of rewriting the
+        whole file. Falls back to a full save, which compacts both away, when the
+        session file is missing or in the old format, or either file has grown long.
+        resource_buckets is None when too many were sampled to append them"""
+        save_directory = session_directory(self.current_project)
+        file_path = os.path.join(save_directory, self.file_name + ".dat")
+        journal_path = os.path.join(save_directory, self.file_name + ".journal")
+        resources_path = os.path.join(save_directory, self.file_name + ".resources")
+        resource_records = RESOURCE_COMPACT_RECORDS if resource_buckets is None else len(resource_buckets)
+        if os.path.exists(resources_path):
+            resource_records += os.path.getsize(resources_path) // RESOURCE_RECORD.size
+
+        if (
+            self.journal is None
+            or self.journal.base is None
+            or not os.path.exists(file_path)
+            or not os.path.exists(journal_path)
+            or is_legacy_session(file_path)
+            or os.path.getsize(journal_path) // JOURNAL_RECORD.size >= JOURNAL_COMPACT_RECORDS
+            or resource_records >= RESOURCE_COMPACT_RECORDS
+        ):
+            self.save_session_data(data)
+            return
+
+        logger.info("Saving session data to capture journal...")
+        previous = self.catalog.get(self.file_name, self.current_project)
+        if resource_buckets:
+            append_resource_buckets(resources_path, resource_buckets, self.journal.generation)
+        append_journal(journal_path, [pack_journal_record(JOURNAL_TOTAL, data["time_spent"])], self.journal.generation)
+        self.data = data
+        self.journal = None
+
+        # The summary block still holds the last full save, the journal adds the rest
+        summary, error = read_session_summary(save_directory, self.file_name)
+        self._record_saved_session(
+            self.file_name, self.current_project, data, file_path, previous, True,
+            summary if error is None else None,
+        )
+
+    def _record_saved_session(self, file_name, project_name, data, file_path, previous, overwriting, summary=None):
+        """Update the session index, catalog and project totals after a save"""
+        index_session(file_name, project_name)
+        if summary is None:
+            summary = summarize_session(data)
+        self.catalog.update(file_name, project_name, summary, file_path)
 
         # Update project metadata if using projects
-        if self.current_project and hasattr(self.controller, "project_handler"):
-            session_count = len(
-                self.controller.project_handler.get_project_sessions(
-                    self.current_project
+        if project_name and hasattr(self.controller, "project_handler"):
+            if overwriting and previous is None:
+                # The old totals of this session are unknown, recount the project
+                self._update_project_totals(project_name, None, None)
+                self.controller.project_handler.rebuild_aggregates([project_name])
+            else:
+                self._update_project_totals(
+                    project_name,
+                    previous,
+                    self.catalog.get(file_name, project_name),
                 )
-            )
-            self.controller.project_handler.update_project_metadata(
-                self.current_project, session_count
-            )
+
+    def journal_capture(self, kind, a, b=0.0):
+        """Append one start, stop or pause event of the running session to its
+        capture journal, so it survives a crash before the session is saved"""
+        if not self.file_name:
+            return
+        if self.journal is None or (self.journal.file_name, self.journal.project_name) != (
+            self.file_name, self.current_project
+        ):
+            self.journal = SessionJournal(self.file_name, self.current_project)
+        self.journal.capture(kind, a, b)
+
+    def get_journal_base(self):
+        """Size of the running session's journal when the run started, None if the
+        run has journaled nothing yet"""
+        return None if self.journal is None else self.journal.base
+
+    def discard_journal(self):
+        """Drop the capture events journaled during a run that is not being saved"""
+        if self.journal is not None:
+            self.journal.discard()
+        self.journal = None
+
+    def _update_project_totals(self, project_name, before, after):
+        """Update the session count of a project and adjust its stored totals by
+        the difference between the before and after catalog rows of one session"""
+        handler = self.controller.project_handler
+        session_count = len(handler.get_project_sessions(project_name))
+        time_delta = 0.0
+        run_delta = 0
+        last_activity = None
+        if before is not None:
+            time_delta -= before["time_spent"]
+            run_delta -= before["run_count"]
+        if after is not None:
+            time_delta += after["time_spent"]
+            run_delta += after["run_count"]
+            last_activity = after["last_stopped"]
+        handler.update_project_metadata(
+            project_name, session_count, time_delta, run_delta, last_activity
+        )
 
     def load_session_data(self, filename, project_name=None):
         """Loads session data from file and checks hash"""
@@ -89,44 +328,27 @@ class FileHandler:
         else:
             load_directory = self.directory
 
-        file_path = os.path.join(load_directory, filename + ".dat")
-        hash_path = os.path.join(load_directory, filename + ".hash")
-
-        if os.path.exists(file_path) and os.path.exists(hash_path):
-            try:
-                # Read data and hash
-                data = read_file(file_path)
-                stored_hash = read_file(hash_path).decode("utf-8")
-
-                # Compute hash of the loaded data
-                computed_hash = compute_hash(data)
-
-                if computed_hash == stored_hash:
-                    self.data = pickle.loads(data)
-                    # Set current project from loaded data if not specified
-                    if not project_name:
-                        saved_project = (
-                            self.data.get("project_name")
-                            if isinstance(self.data, dict)
-                            else None
-                        )
-                        if saved_project:
-                            self.current_project = saved_project  # Set to saved project
-                        else:
-                            self.current_project = None  # No project
-                    self.session_names.append(self.file_name)
+        _, _, data = self.load_sessions([(filename, project_name)])[0]
+        if data is not None:
+            self.data = data
+            # Set current project from loaded data if not specified
+            if not project_name:
+                saved_project = (
+                    self.data.get("project_name")
+                    if isinstance(self.data, dict)
+                    else None
+                )
+                if saved_project:
+                    self.current_project = saved_project  # Set to saved project
                 else:
-                    self.corrupt_sessions.append((filename, "Hash mismatch"))
-                    self.data = None
-            except _pickle.UnpicklingError:
-                self.corrupt_sessions.append((filename, "Data is corrupt"))
-                self.data = None
+                    self.current_project = None  # No project
+            self.session_names.append(self.file_name)
         else:
-            self.corrupt_sessions.append((filename, "No hash file found"))
             self.data = None
 
     def delete_session(self, filename, project_name=None):
-        """Delete data and hash files of a session"""
+        """Delete the data file, capture journal and resource file of a session, and
+        the hash file of old format sessions"""
         # Determine delete directory based on project
         if project_name:
             delete_directory = os.path.join(get_projects_directory(), project_name)
@@ -135,20 +357,178 @@ class FileHandler:
 
         file_path = os.path.join(delete_directory, filename + ".dat")
         hash_path = os.path.join(delete_directory, filename + ".hash")
+        journal_path = os.path.join(delete_directory, filename + ".journal")
+        resources_path = os.path.join(delete_directory, filename + ".resources")
+
+        previous = self.catalog.get(filename, project_name)
+        existed = os.path.exists(file_path)
 
         if os.path.exists(file_path):
             os.remove(file_path)
         if os.path.exists(hash_path):
             os.remove(hash_path)
+        if os.path.exists(journal_path):
+            os.remove(journal_path)
+        if os.path.exists(resources_path):
+            os.remove(resources_path)
+
+        unindex_session(filename, project_name)
+        self.catalog.remove(filename, project_name, delete_directory)
 
         # Update project metadata if using projects
         if project_name and hasattr(self.controller, "project_handler"):
-            session_count = len(
-                self.controller.project_handler.get_project_sessions(project_name)
-            )
-            self.controller.project_handler.update_project_metadata(
-                project_name, session_count
-            )
+            self._update_project_totals(project_name, previous, None)
+            if existed and previous is None:
+                self.controller.project_handler.rebuild_aggregates([project_name])
+
+    def load_sessions(self, sessions, reducer=None):
+        """Load many sessions at once. sessions is a list of (name, project) pairs.
+        Files are read and verified on a bounded thread pool. If reducer is given it
+        is applied to each session's data and only its result is returned; it must
+        be a module level function, since large sessions may then be decoded in
+        worker processes. Returns a list of (name, project, data or result) in the
+        order of sessions, with None for sessions that failed to load, which are
+        added to corrupt_sessions"""
+        def read(session):
+            name, project = session
+            try:
+                return read_session_payload(session_directory(project), name)
+            except Exception as e:
+                # One unreadable file must not abort the whole load
+                return None, f"Could not read session: {e}"
+
+        def decode(session, payload):
+            name, project = session
+            try:
+                data, error = decode_session(session_directory(project), name, payload)
+                if error is None and reducer is not None:
+                    data = reducer(data)
+                return data, error
+            except Exception as e:
+                return None, f"Could not load session: {e}"
+
+        sessions = list(sessions)
+        if len(sessions) == 1:
+            payloads = [read(sessions[0])]
+        else:
+            with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as threads:
+                payloads = list(threads.map(read, sessions))
+
+        large = []
+        if reducer is not None and (os.cpu_count() or 1) > 1:
+            large = [i for i, (payload, error) in enumerate(payloads)
+                     if error is None and len(payload) >= PROCESS_DECODE_BYTES]
+            if sum(len(payloads[i][0]) for i in large) < PROCESS_POOL_MIN_BYTES:
+                large = []
+
+        results = {}
+        processes = None
+        if large:
+            # Forking would copy the Tk interpreter and the locks held by other threads
+            processes = ProcessPoolExecutor(max_workers=min(len(large), os.cpu_count()),
+                                            mp_context=multiprocessing.get_context("spawn"))
+        try:
+            futures = {}
+            for i in large:
+                name, project = sessions[i]
+                futures[i] = processes.submit(_decode_and_reduce, session_directory(project),
+                                              name, bytes(payloads[i][0]), reducer)
+            # Unpickling holds the GIL, so the other sessions are decoded right here meanwhile
+            for i, (payload, error) in enumerate(payloads):
+                if error is None and i not in futures:
+                    results[i] = decode(sessions[i], payload)
+            for i, future in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    # e.g. a worker that died, the other sessions still load
+                    results[i] = None, f"Could not load session: {e}"
+        finally:
+            if processes is not None:
+                processes.shutdown()
+
+        loaded = []
+        for i, (name, project) in enumerate(sessions):
+            error = payloads[i][1]
+            data = None
+            if error is None:
+                data, error = results[i]
+            if error is not None:
+                self.corrupt_sessions.append((name, error))
+            loaded.append((name, project, data))
+        return loaded
+
+    def get_session_catalog(self):
+        """Returns one summary row per session from the session catalog.
+        Session summaries are only read from disk when the catalog is stale"""
+        def read(session):
+            name, project = session
+            try:
+                return read_session_summary(session_directory(project), name)
+            except Exception as e:
+                # One unreadable file must not abort the whole rescan
+                return None, f"Could not read session: {e}"
+
+        def loader(sessions):
+            with ThreadPoolExecutor(max_workers=LOAD_WORKERS) as threads:
+                results = list(threads.map(read, sessions))
+            for (name, _), (_, error) in zip(sessions, results):
+                if error is not None:
+                    self.corrupt_sessions.append((name, error))
+            return [summary for summary, _ in results]
+
+        # While the session watcher runs, changes reach the catalog through
+        # apply_session_changes() and the directories need no checking
+        watcher = getattr(self.controller, "session_watcher", None)
+        watched = watcher is not None and watcher.is_running()
+        rows = self.catalog.entries(loader, check=not (watched and self.catalog_watched))
+        self.catalog_watched = watched
+        known_names = set(self.session_names)
+        for row in rows:
+            if row["name"] not in known_names:
+                known_names.add(row["name"])
+                self.session_names.append(row["name"])
+        return rows
+
+    def apply_session_changes(self, changes):
+        """Bring the session catalog, session index and project totals up to date
+        with (project, name) keys reported by the session watcher. Only sessions
+        whose files differ from their catalog row are read again.
+        Returns the keys of the sessions whose catalog row changed"""
+        if RESCAN in changes:
+            self.catalog.invalidate()
+            self.catalog_watched = False
+            return {RESCAN}
+
+        updated = set()
+        for project, name in changes:
+            if name is None:
+                continue  # a project itself, its sessions are reported separately
+            directory = session_directory(project)
+            file_path = os.path.join(directory, name + ".dat")
+            previous = self.catalog.get(name, project)
+
+            if not os.path.exists(file_path):
+                if previous is not None:
+                    unindex_session(name, project)
+                    self.catalog.remove(name, project, directory)
+                    if project and hasattr(self.controller, "project_handler"):
+                        self._update_project_totals(project, previous, None)
+                    updated.add((project, name))
+                continue
+            if self.catalog.is_current(name, project, file_path):
+                continue  # our own save, already cataloged
+
+            summary, error = read_session_summary(directory, name)
+            if error is not None:
+                self.corrupt_sessions.append((name, error))
+                continue
+            index_session(name, project)
+            self.catalog.update(name, project, summary, file_path)
+            if project and hasattr(self.controller, "project_handler"):
+                self._update_project_totals(project, previous, self.catalog.get(name, project))
+            updated.add((project, name))
+        return updated
 
     def get_data(self):
         """Gets session data, and ensures the returned data is always a dictionary."""
@@ -166,6 +546,10 @@ class FileHandler:
     def get_project_name(self):
         return self.current_project
 
+    def get_catalog_row(self, name, project=None):
+        """Gets the catalog row of a session, or None if it is not cataloged"""
+        return self.catalog.get(name, project)
+
     def get_session_names(self):
         return self.session_names
 
@@ -209,6 +593,13 @@ class FileHandler:
             if session_data is None:
                 return False
 
+            previous = self.catalog.get(session_name, current_project)
+            if previous is None:
+                previous = {
+                    "time_spent": session_data.get("time_spent", 0.0),
+                    "run_count": len(session_data.get("time_captures", {}).get("starts", [])),
+                }
+
             # Determine source and target directories
             if current_project:
                 source_dir = os.path.join(get_projects_directory(), current_project)
@@ -232,10 +623,8 @@ class FileHandler:
             target_data_file = os.path.join(target_dir, session_name + ".dat")
             target_hash_file = os.path.join(target_dir, session_name + ".hash")
 
-            # Check if source files exist
-            if not os.path.exists(source_data_file) or not os.path.exists(
-                source_hash_file
-            ):
+            # Check if source file exists
+            if not os.path.exists(source_data_file):
                 return False
 
             # Check if target files already exist (shouldn't happen, but safety check)
@@ -261,30 +650,18 @@ class FileHandler:
                 os.remove(source_data_file)
             if os.path.exists(source_hash_file):
                 os.remove(source_hash_file)
-
-            # Update project metadata for both projects
-            if hasattr(self.controller, "project_handler"):
-                # Update source project metadata
-                if current_project:
-                    session_count = len(
-                        self.controller.project_handler.get_project_sessions(
-                            current_project
-                        )
-                    )
-                    self.controller.project_handler.update_project_metadata(
-                        current_project, session_count
-                    )
-
-                # Update target project metadata
-                if target_project:
-                    session_count = len(
-                        self.controller.project_handler.get_project_sessions(
-                            target_project
-                        )
-                    )
-                    self.controller.project_handler.update_project_metadata(
-                        target_project, session_count
-                    )
+            source_journal_file = os.path.join(source_dir, session_name + ".journal")
+            if os.path.exists(source_journal_file):
+                os.remove(source_journal_file)
+            source_resources_file = os.path.join(source_dir, session_name + ".resources")
+            if os.path.exists(source_resources_file):
+                os.remove(source_resources_file)
+            unindex_session(session_name, current_project)
+            self.catalog.remove(session_name, current_project, source_dir)
+
+            # Update source project metadata, the target was updated when saving
+            if current_project and hasattr(self.controller, "project_handler"):
+                self._update_project_totals(current_project, previous, None)
 
             return True
 
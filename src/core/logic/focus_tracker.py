@@ -0,0 +1,126 @@
+"""
+Tracks when the tracked app has the input focus, so sessions record focused time
+besides the time the app is merely running. On X11 the root window's
+_NET_ACTIVE_WINDOW property is watched through PropertyNotify events, nothing is
+polled. Focus intervals are recorded in the time captures next to the pauses.
+"""
+
+import select
+import sys
+import threading
+import time
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class X11FocusBackend:
+    """Reports the PID of the active window of an X11 display, the DISPLAY
+    environment variable by default. Uses python-xlib, which pynput requires on Linux"""
+    def __init__(self, display_name=None):
+        from Xlib import X, display  # type: ignore
+
+        self.X = X
+        self.display = display.Display(display_name)
+        self.root = self.display.screen().root
+        self.active_window_atom = self.display.intern_atom("_NET_ACTIVE_WINDOW")
+        self.pid_atom = self.display.intern_atom("_NET_WM_PID")
+        self.root.change_attributes(event_mask=X.PropertyChangeMask)
+        self.display.flush()
+
+    def active_pid(self):
+        """The PID of the process owning the active window, None if unknown"""
+        from Xlib import error  # type: ignore
+
+        try:
+            active = self.root.get_full_property(self.active_window_atom, self.X.AnyPropertyType)
+            if active is None or not len(active.value) or not active.value[0]:
+                return None
+            window = self.display.create_resource_object("window", active.value[0])
+            pid = window.get_full_property(self.pid_atom, self.X.AnyPropertyType)
+        except error.XError:
+            return None  # the window closed in the meantime
+        if pid is None or not len(pid.value):
+            return None
+        return int(pid.value[0])
+
+    def wait(self, timeout):
+        """Block until the active window changes or timeout passes. Returns True if
+        it changed"""
+        if not self.display.pending_events():
+            readable, _, _ = select.select([self.display], [], [], timeout)
+            if not readable:
+                return False
+        changed = False
+        for _ in range(self.display.pending_events()):
+            event = self.display.next_event()
+            if event.type == self.X.PropertyNotify and event.atom == self.active_window_atom:
+                changed = True
+        return changed
+
+    def close(self):
+        self.display.close()
+
+
+class FocusTracker:
+    def __init__(self, parent, logic_controller):
+        self.parent = parent
+        self.logic = logic_controller
+        self.stop_event = threading.Event()
+        self.update_thread = None
+        self.pids = set()
+        self.focus_start = None
+        self.stop_time = None
+
+    def track(self, pids):
+        """Follow the focus of the given processes, the ones the tracked app was
+        resolved to. Starts watching on the first call of a session"""
+        self.pids = set(pids)
+        if self.update_thread is None and sys.platform.startswith("linux"):
+            self.stop_event.clear()
+            self.stop_time = None
+            self.update_thread = threading.Thread(target=self._watch_focus, name="focus_tracker", daemon=True)
+            self.update_thread.start()
+
+    def _watch_focus(self):
+        try:
+            backend = X11FocusBackend()
+        except Exception as e:
+            logger.info(f"Focus tracking unavailable: {e}")
+            return
+        try:
+            self._update(backend.active_pid())
+            while not self.stop_event.is_set():
+                if backend.wait(0.5):
+                    self._update(backend.active_pid())
+        except Exception as e:
+            logger.error(f"Focus tracking stopped: {e}")
+        finally:
+            backend.close()
+            self._update(None, self.stop_time)
+
+    def _has_process(self, pid):
+        if pid in self.pids:
+            return True
+        # The window may belong to a process the app started since it was resolved,
+        # the last scan of the app tracker knows it without scanning again
+        app = self.logic.app_tracker.get_selected_app()
+        return bool(app) and self.logic.app_tracker.get_app_of_pid(pid) == app
+
+    def _update(self, pid, now=None):
+        """Open or close the current focus interval for the new active window"""
+        focused = pid is not None and self._has_process(pid)
+        now = now or time.time()
+        if focused and self.focus_start is None:
+            self.focus_start = now
+        elif not focused and self.focus_start is not None:
+            self.logic.time_tracker.add_focus(self.focus_start, now - self.focus_start)
+            self.focus_start = None
+
+    def stop(self):
+        """Stop watching, recording the focus interval still open"""
+        self.stop_time = time.time()
+        self.stop_event.set()
+        if self.update_thread is not None:
+            self.update_thread.join(timeout=1)
+            self.update_thread = None
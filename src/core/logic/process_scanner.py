@@ -0,0 +1,312 @@
+"""
+Incremental process scanner. Keeps the list of running app names up to date by
+diffing the PID set between scans, so only processes that started since the last
+scan are inspected in full. A PID seen before may have been reused by another
+process in between, which is caught by checking start times: those of the tracked
+apps' processes on every scan and whenever one is resolved, and those of all
+other processes in a sweep every REUSE_SWEEP_SCANS scans. Processes are enumerated
+by a backend: /proc is read directly on Linux, psutil is used everywhere else.
+A parent -> children index is kept along the way, so an app can be resolved to
+its whole process tree.
+"""
+
+import bisect
+import os
+import sys
+
+import psutil  # type: ignore
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Our own process names, never offered for tracking
+IGNORED_NAMES = frozenset({"AppUsageGUI", "Python", "Python3"})
+
+# Start times of all known processes are checked for reused PIDs once per this
+# many scans, reading them every scan would cost about as much as a full scan
+REUSE_SWEEP_SCANS = 20
+
+
+def app_sort_key(app_name):
+    """App names are listed case-insensitively on Windows"""
+    return app_name.casefold() if os.name == "nt" else app_name
+
+
+class PsutilBackend:
+    """Process enumeration through psutil, works on every platform"""
+    def pids(self):
+        return set(psutil.pids())
+
+    def inspect(self, pids):
+        """Returns {pid: (name, create_time, ppid)} for the given processes.
+        Processes that are gone are left out, inaccessible ones get an empty name"""
+        processes = {}
+        for pid in pids:
+            try:
+                process = psutil.Process(pid)
+                with process.oneshot():
+                    processes[pid] = (process.name(), process.create_time(), process.ppid())
+            except psutil.NoSuchProcess:
+                pass
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                processes[pid] = ("", 0.0, 0)  # remembered so it is not inspected again
+        return processes
+
+    def create_times(self, pids):
+        """Returns {pid: create_time} for the given processes, None if inaccessible.
+        Processes that are gone are left out"""
+        create_times = {}
+        for pid in pids:
+            try:
+                create_times[pid] = psutil.Process(pid).create_time()
+            except psutil.NoSuchProcess:
+                pass
+            except (psutil.AccessDenied, psutil.ZombieProcess):
+                create_times[pid] = None
+        return create_times
+
+
+class ProcfsBackend:
+    """Process enumeration reading /proc directly on Linux. Name, parent and start
+    time all come from one read of /proc/<pid>/stat into a reused buffer, without the
+    per process objects and calls of psutil. Names are resolved like psutil does"""
+    COMM_LENGTH = 15  # longer names are truncated in stat
+
+    def __init__(self, root="/proc"):
+        self.root = root
+        self.buffer = bytearray(4096)
+        self.view = memoryview(self.buffer)
+        self.clock_ticks = os.sysconf("SC_CLK_TCK")
+        self.boot_time = self._boot_time()
+
+    def _boot_time(self):
+        with open(os.path.join(self.root, "stat"), "rb") as f:
+            for line in f:
+                if line.startswith(b"btime"):
+                    return float(line.split()[1])
+        raise RuntimeError(f"No btime in {self.root}/stat")
+
+    def _read(self, path):
+        """Read a small /proc file into the shared buffer. Returns the number of
+        bytes read, None if the file is gone"""
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except (FileNotFoundError, ProcessLookupError):
+            return None
+        try:
+            return os.readv(fd, [self.buffer])
+        except ProcessLookupError:
+            return None
+        finally:
+            os.close(fd)
+
+    def pids(self):
+        with os.scandir(self.root) as entries:
+            return {int(entry.name) for entry in entries if entry.name.isdigit()}
+
+    def inspect(self, pids):
+        """Returns {pid: (name, create_time, ppid)} for the given processes.
+        Processes that are gone are left out, inaccessible ones get an empty name"""
+        processes = {}
+        for pid in pids:
+            try:
+                size = self._read(f"{self.root}/{pid}/stat")
+            except PermissionError:
+                processes[pid] = ("", 0.0, 0)
+                continue
+            if size is None:
+                continue
+            stat = self.view[:size].tobytes()
+            # pid (comm) state ppid ... the name may itself contain spaces and parentheses
+            name_end = stat.rfind(b")")
+            name = stat[stat.find(b"(") + 1:name_end].decode("utf-8", "replace")
+            fields = stat[name_end + 2:].split(maxsplit=20)
+            if len(name) >= self.COMM_LENGTH:
+                name = self._full_name(pid, name)
+            processes[pid] = (name, self.boot_time + int(fields[19]) / self.clock_ticks, int(fields[1]))
+        return processes
+
+    def create_times(self, pids):
+        """Returns {pid: create_time} for the given processes, None if inaccessible.
+        Processes that are gone are left out"""
+        create_times = {}
+        for pid in pids:
+            try:
+                size = self._read(f"{self.root}/{pid}/stat")
+            except PermissionError:
+                create_times[pid] = None
+                continue
+            if size is None:
+                continue
+            stat = self.view[:size].tobytes()
+            fields = stat[stat.rfind(b")") + 2:].split(maxsplit=20)
+            create_times[pid] = self.boot_time + int(fields[19]) / self.clock_ticks
+        return create_times
+
+    def _full_name(self, pid, name):
+        """Names truncated in stat are completed from the command line"""
+        try:
+            size = self._read(f"{self.root}/{pid}/cmdline")
+        except PermissionError:
+            return name
+        if not size:
+            return name
+        executable = os.path.basename(self.view[:size].tobytes().split(b"\0", 1)[0].decode("utf-8", "replace"))
+        return executable if executable.startswith(name) else name
+
+
+def default_backend():
+    """The fastest process enumeration backend available on this platform"""
+    if sys.platform.startswith("linux"):
+        try:
+            return ProcfsBackend()
+        except (OSError, RuntimeError, ValueError) as e:
+            logger.warning(f"Cannot read /proc directly, using psutil: {e}")
+    return PsutilBackend()
+
+
+class ProcessScanner:
+    def __init__(self, is_excluded=None, backend=None):
+        self.is_excluded = is_excluded or (lambda pid, create_time: False)
+        self.backend = backend or default_backend()
+        self.processes = {}  # pid -> (app name, create_time, listed, ppid)
+        self.app_pids = {}  # listed app name -> its pids
+        self.children = {}  # pid -> pids of its children
+        self.app_names = []  # sorted listed app names
+        self.churn = 0  # processes started or exited in the last scan
+        self.scans = 0
+        self.watched = {}  # app name -> pids checked for reuse on every scan, see watch()
+
+    def _list_name(self, app_name, pid):
+        """Add a process to an app. Returns True if the app is new"""
+        pids = self.app_pids.setdefault(app_name, set())
+        pids.add(pid)
+        if len(pids) > 1:
+            return False
+        bisect.insort(self.app_names, app_name, key=app_sort_key)
+        return True
+
+    def _unlist_name(self, app_name, pid):
+        """Remove a process from an app. Returns True if it was the last one"""
+        pids = self.app_pids[app_name]
+        pids.discard(pid)
+        if pids:
+            return False
+        del self.app_pids[app_name]
+        index = bisect.bisect_left(self.app_names, app_sort_key(app_name), key=app_sort_key)
+        while self.app_names[index] != app_name:
+            index += 1  # names that only differ in case on Windows
+        del self.app_names[index]
+        return True
+
+    def scan(self):
+        """Update the app names from processes started or exited since the last
+        scan. Returns True if the app names changed"""
+        pids = self.backend.pids()
+        exited = self.processes.keys() - pids
+        started = pids - self.processes.keys()
+
+        # A PID in both snapshots may have been reused by a new process in between,
+        # which then replaces the old one: an exit followed by a start
+        self.scans += 1
+        if self.scans % REUSE_SWEEP_SCANS == 0:
+            reused = self._reused(pids)
+        else:
+            reused = self._reused(set().union(*self.watched.values()) & pids)
+        exited |= reused
+        started |= reused
+        self.churn = len(exited) + len(started)
+        changed = self._remove(exited)
+        return self._add(started) or changed
+
+    def verify(self, pids):
+        """Check the start times of known processes now, replacing those whose PID
+        was reused since the last scan. Returns True if any was replaced"""
+        reused = self._reused(pids)
+        if reused:
+            self._remove(reused)
+            self._add(reused)
+        return bool(reused)
+
+    def watch(self, app_name, pids):
+        """Check these processes for reuse on every scan, e.g. the tree of a tracked
+        app. Replaces the pids watched for the app, an empty tree stops watching it"""
+        if pids:
+            self.watched[app_name] = set(pids)
+        else:
+            self.watched.pop(app_name, None)
+
+    def _reused(self, pids):
+        """The known processes among pids whose PID now belongs to another process"""
+        reused = set()
+        for pid, create_time in self.backend.create_times([pid for pid in pids if pid in self.processes]).items():
+            known = self.processes[pid][1]
+            if create_time is not None and known and abs(create_time - known) > 0.01:
+                reused.add(pid)
+        return reused
+
+    def _remove(self, exited):
+        """Forget exited processes. Returns True if the app names changed"""
+        changed = False
+        if exited and self.watched:
+            # Trees whose processes all exited are no longer watched
+            self.watched = {app_name: pids - exited for app_name, pids in self.watched.items() if pids - exited}
+        for pid in exited:
+            app_name, _, listed, ppid = self.processes.pop(pid)
+            if listed and self._unlist_name(app_name, pid):
+                changed = True
+            siblings = self.children.get(ppid)
+            if siblings is not None:
+                siblings.discard(pid)
+                if not siblings:
+                    del self.children[ppid]
+            # Orphans are reparented by the kernel, they leave the exited tree
+            self.children.pop(pid, None)
+        return changed
+
+    def _add(self, started):
+        """Inspect started processes. Returns True if the app names changed"""
+        changed = False
+        for pid, (name, create_time, ppid) in self.backend.inspect(started).items():
+            app_name = name.split(".")[0]  # Use the base name of the process
+            listed = bool(app_name) and app_name not in IGNORED_NAMES and not self.is_excluded(pid, create_time)
+            self.processes[pid] = (app_name, create_time, listed, ppid)
+            self.children.setdefault(ppid, set()).add(pid)
+            if listed and self._list_name(app_name, pid):
+                changed = True
+        return changed
+
+    def app_tree(self, app_name):
+        """PIDs of an app as a whole, as of the last scan: its root processes (those
+        whose parent is not a process of the same app) and all their descendants,
+        whatever their names, e.g. the helper processes of browsers and IDEs"""
+        app_pids = self.app_pids.get(app_name, ())
+        tree = set()
+        stack = [pid for pid in app_pids if self.processes[pid][3] not in app_pids]
+        while stack:
+            pid = stack.pop()
+            if pid not in tree:
+                tree.add(pid)
+                stack.extend(self.children.get(pid, ()))
+        return tree
+
+    def app_of(self, pid):
+        """The listed app a process belongs to: its own, or that of its nearest
+        listed ancestor, e.g. for the helper process owning a browser window.
+        None if the process is unknown or not part of any listed app"""
+        seen = set()
+        while pid in self.processes and pid not in seen:
+            seen.add(pid)
+            app_name, _, listed, ppid = self.processes[pid]
+            if listed:
+                return app_name
+            pid = ppid
+        return None
+
+    def reset(self):
+        """Forget every process, so the next scan inspects all of them again"""
+        self.processes = {}
+        self.app_pids = {}
+        self.children = {}
+        self.app_names = []
+        self.watched = {}
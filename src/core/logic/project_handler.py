@@ -3,9 +3,10 @@ and session organization within projects."""
 
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-from core.utils.file_utils import get_projects_directory
+from core.utils.file_utils import atomic_open, get_projects_directory, invalidate_session_index, read_session_summary
 
 import logging
 logger = logging.getLogger(__name__)
@@ -44,8 +45,8 @@ class ProjectHandler:
             return {"projects": {}}
 
     def _save_metadata(self, metadata):
-        """Save projects metadata to file"""
-        with open(self.projects_metadata_file, 'w') as f:
+        """Atomically save projects metadata to file"""
+        with atomic_open(self.projects_metadata_file, 'w') as f:
             json.dump(metadata, f, indent=2)
 
     def create_project(self, project_name):
@@ -71,7 +72,10 @@ class ProjectHandler:
         metadata["projects"][project_name] = {
             "created_date": datetime.now().isoformat(),
             "last_modified": datetime.now().isoformat(),
-            "session_count": 0
+            "session_count": 0,
+            "time_spent": 0.0,
+            "run_count": 0,
+            "last_activity": 0
         }
         self._save_metadata(metadata)
         
@@ -90,6 +94,7 @@ class ProjectHandler:
             shutil.rmtree(project_dir)
         except OSError as e:
             return False, f"Failed to delete project directory: {str(e)}"
+        invalidate_session_index()
         
         # Update metadata
         metadata = self._load_metadata()
@@ -140,13 +145,21 @@ class ProjectHandler:
         """Get the number of sessions in a project"""
         return len(self.get_project_sessions(project_name))
 
-    def update_project_metadata(self, project_name, session_count=None):
-        """Update project metadata"""
+    def update_project_metadata(self, project_name, session_count=None,
+                                time_delta=0.0, run_delta=0, last_activity=None):
+        """Update project metadata. Time and run totals are adjusted by the given
+        deltas, so callers only pass the difference made by one session change"""
         metadata = self._load_metadata()
         if project_name in metadata["projects"]:
-            metadata["projects"][project_name]["last_modified"] = datetime.now().isoformat()
+            project = metadata["projects"][project_name]
+            project["last_modified"] = datetime.now().isoformat()
             if session_count is not None:
-                metadata["projects"][project_name]["session_count"] = session_count
+                project["session_count"] = session_count
+            if "time_spent" in project:
+                project["time_spent"] = max(0.0, project["time_spent"] + time_delta)
+                project["run_count"] = max(0, project["run_count"] + run_delta)
+                if last_activity:
+                    project["last_activity"] = max(project["last_activity"], last_activity)
             self._save_metadata(metadata)
 
     def set_selected_project(self, project_name):
@@ -166,28 +179,74 @@ class ProjectHandler:
             return project_info
         return None
 
+    def get_all_project_info(self):
+        """Get detailed information about every project, reading the metadata once"""
+        metadata = self._load_metadata()
+        projects = {}
+        for project_name, info in metadata["projects"].items():
+            project_info = info.copy()
+            project_info["session_count"] = self.get_project_session_count(project_name)
+            projects[project_name] = project_info
+        return projects
+
     def get_project_total_time(self, project_name):
         """Get the total time from all sessions in a project"""
         if not self.project_exists(project_name):
             return 0.0
-        
-        total_time = 0.0
-        project_dir = self.get_project_directory(project_name)
-        
-        # Get all session files in the project directory
-        for file in os.listdir(project_dir):
-            if file.endswith('.dat'):
-                session_file = file[:-4]  # Remove .dat extension
-                try:
-                    # Load session data to get time_spent
-                    self.controller.file_handler.load_session_data(session_file, project_name)
-                    session_data = self.controller.file_handler.get_data()
-                    
-                    if isinstance(session_data, dict) and 'time_spent' in session_data:
-                        total_time += session_data['time_spent']
-                except Exception as e:
+
+        aggregates = self.get_project_aggregates(project_name)
+        return aggregates["time_spent"] if aggregates else 0.0
+
+    def get_project_aggregates(self, project_name):
+        """Get the stored time_spent, run_count and last_activity of a project.
+        Projects saved before totals were kept are rebuilt on first access"""
+        metadata = self._load_metadata()
+        project = metadata["projects"].get(project_name)
+        if project is None or "time_spent" not in project:
+            missing = [name for name, info in metadata["projects"].items() if "time_spent" not in info]
+            if project_name not in missing:
+                missing.append(project_name)
+            return self.rebuild_aggregates(missing).get(project_name)
+        return {key: project[key] for key in ("time_spent", "run_count", "last_activity")}
+
+    def rebuild_aggregates(self, project_names=None):
+        """Recompute project totals from the session summaries and store them in the
+        metadata, repairing any drift. Sessions of all projects are read in one
+        parallel pass. Returns {project_name: aggregates}"""
+        if project_names is None:
+            project_names = [name for name in os.listdir(self.projects_directory)
+                             if os.path.isdir(self.get_project_directory(name)) and name != "__pycache__"]
+
+        jobs = []
+        for project_name in project_names:
+            for file in self.get_project_sessions(project_name):
+                jobs.append((project_name, file[:-4]))
+
+        def read(job):
+            project_name, session_file = job
+            try:
+                return read_session_summary(self.get_project_directory(project_name), session_file)
+            except Exception as e:
+                # One unreadable file must not abort the whole rebuild
+                return None, f"Could not read session: {e}"
+
+        aggregates = {name: {"time_spent": 0.0, "run_count": 0, "last_activity": 0} for name in project_names}
+        with ThreadPoolExecutor() as pool:
+            for (project_name, session_file), (summary, error) in zip(jobs, pool.map(read, jobs)):
+                if error is not None:
                     # Skip corrupted or invalid session files
-                    logger.warning(f"Warning: Could not load session {session_file}: {e}")
+                    logger.warning(f"Warning: Could not load session {session_file}: {error}")
                     continue
-        
-        return total_time
+                totals = aggregates[project_name]
+                totals["time_spent"] += summary["time_spent"] or 0.0
+                totals["run_count"] += summary["run_count"]
+                totals["last_activity"] = max(totals["last_activity"], summary["last_stopped"])
+
+        metadata = self._load_metadata()
+        for project_name, totals in aggregates.items():
+            if project_name in metadata["projects"]:
+                metadata["projects"][project_name].update(totals)
+        self._save_metadata(metadata)
+        logger.info(f"Rebuilt aggregates for {len(aggregates)} project(s) from {len(jobs)} session(s)")
+
+        return aggregates
@@ -0,0 +1,222 @@
+"""
+Samples the resource usage of the tracked app: CPU time, resident memory and disk
+I/O, summed over the processes the app was resolved to. Samples are kept in a
+bounded series that is downsampled as it fills, so a session running for days
+costs as little memory as a short one. The series is saved with the session,
+next to its time captures; incremental saves only append the buckets of the run.
+"""
+
+import threading
+import time
+
+import psutil  # type: ignore
+
+from core.utils.file_utils import read_file, config_file
+
+import logging
+logger = logging.getLogger(__name__)
+
+# At most this many buckets are kept per session, each a
+# (start, duration, cpu_seconds, rss_avg, rss_peak, read_bytes, write_bytes) tuple
+SERIES_CAPACITY = 720
+
+
+def _merge(a, b):
+    """Merge two consecutive buckets into one"""
+    duration = a[1] + b[1]
+    if duration > 0:
+        rss_avg = (a[3] * a[1] + b[3] * b[1]) / duration
+    else:
+        rss_avg = (a[3] + b[3]) / 2
+    return (a[0], duration, a[2] + b[2], rss_avg, max(a[4], b[4]), a[5] + b[5], a[6] + b[6])
+
+
+class ResourceSeries:
+    """Resource usage over a session as a series of buckets. Once SERIES_CAPACITY
+    buckets are held, neighbouring buckets are merged pairwise and every new bucket
+    takes twice as many samples, so the whole session stays covered at a coarser
+    resolution"""
+    def __init__(self, usage=None):
+        usage = usage or {}
+        self.buckets = list(usage.get("buckets", []))
+        self.stride = usage.get("stride", 1)  # samples per bucket
+        self.pending = None
+        self.pending_count = 0
+        # Buckets completed since loading, at their own resolution. None once there
+        # are more than a whole series holds, the series is then saved in full
+        self.new_buckets = []
+        # Buckets appended from a resource file may exceed the capacity
+        while len(self.buckets) > SERIES_CAPACITY:
+            self._downsample()
+
+    def add(self, start, duration, cpu_seconds, rss, read_bytes, write_bytes):
+        sample = (start, duration, cpu_seconds, rss, rss, read_bytes, write_bytes)
+        self.pending = sample if self.pending is None else _merge(self.pending, sample)
+        self.pending_count += 1
+        if self.pending_count >= self.stride:
+            if len(self.buckets) >= SERIES_CAPACITY:
+                self._downsample()
+            self.buckets.append(self.pending)
+            if self.new_buckets is not None:
+                self.new_buckets.append(self.pending)
+                if len(self.new_buckets) > SERIES_CAPACITY:
+                    self.new_buckets = None
+            self.pending = None
+            self.pending_count = 0
+
+    def _downsample(self):
+        merged = [_merge(a, b) for a, b in zip(self.buckets[::2], self.buckets[1::2])]
+        if len(self.buckets) % 2:
+            merged.append(self.buckets[-1])
+        self.buckets = merged
+        self.stride *= 2
+
+    def to_dict(self):
+        buckets = self.buckets if self.pending is None else self.buckets + [self.pending]
+        return {"stride": self.stride, "buckets": list(buckets)}
+
+    def get_new_buckets(self):
+        """The buckets sampled since loading, for saving them incrementally. None if
+        there are too many"""
+        if self.new_buckets is None or self.pending is None:
+            return self.new_buckets
+        return self.new_buckets + [self.pending]
+
+
+def summarize_resource_usage(usage):
+    """Average and peak figures of a saved series: CPU usage in percent of one core,
+    resident memory in bytes and total disk I/O in bytes. Returns None if the
+    session has no resource samples"""
+    buckets = (usage or {}).get("buckets")
+    if not buckets:
+        return None
+    duration = sum(bucket[1] for bucket in buckets)
+    if duration <= 0:
+        return None
+    return {
+        "cpu_avg": sum(bucket[2] for bucket in buckets) / duration * 100,
+        "cpu_peak": max(bucket[2] / bucket[1] * 100 for bucket in buckets if bucket[1] > 0),
+        "rss_avg": sum(bucket[3] * bucket[1] for bucket in buckets) / duration,
+        "rss_peak": max(bucket[4] for bucket in buckets),
+        "read_bytes": sum(bucket[5] for bucket in buckets),
+        "write_bytes": sum(bucket[6] for bucket in buckets),
+    }
+
+
+class ResourceSampler:
+    """Samples the processes of the tracked app at the resource_sample_interval,
+    while the time tracker is running and not paused"""
+    def __init__(self, parent, logic_controller):
+        self.parent = parent
+        self.logic = logic_controller
+        try:
+            self.interval = read_file(config_file())["resource_sample_interval"]
+        except (FileNotFoundError, KeyError):
+            self.interval = 5  # Default value
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.update_thread = None
+        self.series = ResourceSeries()
+        self.processes = {}  # pid -> psutil.Process
+        self.counters = {}  # pid -> last (cpu_seconds, read_bytes, write_bytes)
+        self.last_sample = None
+
+    def track(self, pids):
+        """Sample the given processes, the ones the tracked app was resolved to.
+        Starts sampling on the first call of a session"""
+        with self.lock:
+            for pid in pids:
+                if pid not in self.processes:
+                    try:
+                        self.processes[pid] = psutil.Process(pid)
+                    except psutil.NoSuchProcess:
+                        pass
+        if self.update_thread is None:
+            if self.logic.file_handler.get_continuing_session():
+                # Continue the series saved with the session
+                self.series = ResourceSeries(self.logic.file_handler.get_data().get("resource_usage"))
+            self.stop_event.clear()
+            self.update_thread = threading.Thread(target=self._sample_periodically, name="resource_sampler", daemon=True)
+            self.update_thread.start()
+
+    def _sample_periodically(self):
+        while not self.stop_event.is_set():
+            try:
+                self._sample()
+            except Exception as e:
+                logger.error(f"Resource sampling failed: {e}")
+            self.stop_event.wait(timeout=self.interval)
+
+    def _read_counters(self, process):
+        """(cpu_seconds, read_bytes, write_bytes), rss of one process"""
+        with process.oneshot():
+            times = process.cpu_times()
+            rss = process.memory_info().rss
+            try:
+                io = process.io_counters()
+                read_bytes, write_bytes = io.read_bytes, io.write_bytes
+            except (AttributeError, psutil.AccessDenied):
+                read_bytes = write_bytes = 0  # Not available on macOS or for other users
+        return (times.user + times.system, read_bytes, write_bytes), rss
+
+    def _sample(self):
+        now = time.time()
+        cpu_seconds = read_bytes = write_bytes = 0.0
+        rss = 0
+        with self.lock:
+            for pid, process in list(self.processes.items()):
+                try:
+                    counters, process_rss = self._read_counters(process)
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    del self.processes[pid]
+                    self.counters.pop(pid, None)
+                    continue
+                except psutil.AccessDenied:
+                    continue
+                rss += process_rss
+                # Usage is counted from the first sample of each process
+                previous = self.counters.get(pid)
+                self.counters[pid] = counters
+                if previous is not None:
+                    cpu_seconds += counters[0] - previous[0]
+                    read_bytes += counters[1] - previous[1]
+                    write_bytes += counters[2] - previous[2]
+
+            # Usage while paused is not part of the session
+            if self.last_sample is not None and not self.logic.time_tracker.get_is_paused():
+                self.series.add(self.last_sample, now - self.last_sample, cpu_seconds, rss, read_bytes, write_bytes)
+            self.last_sample = now
+
+    def get_resource_usage(self):
+        """The series to save with the session"""
+        with self.lock:
+            return self.series.to_dict()
+
+    def get_new_resource_buckets(self):
+        """The buckets sampled in this run of the session, None if there are more
+        than one series holds"""
+        with self.lock:
+            buckets = self.series.get_new_buckets()
+            return None if buckets is None else list(buckets)
+
+    def set_interval(self, seconds):
+        self.interval = seconds
+
+    def stop(self):
+        self.stop_event.set()
+        if self.update_thread is not None:
+            self.update_thread.join(timeout=1)
+            self.update_thread = None
+            # Count the usage up to now
+            try:
+                self._sample()
+            except Exception as e:
+                logger.error(f"Resource sampling failed: {e}")
+
+    def reset(self):
+        self.stop()
+        with self.lock:
+            self.series = ResourceSeries()
+            self.processes = {}
+            self.counters = {}
+            self.last_sample = None
@@ -0,0 +1,198 @@
+"""Persistent catalog of session summaries. Keeps one small row per session so list
+views can render without reading every session file.
+The catalog is kept up to date by the file handler and only falls back to a scan of
+the session directories when the directories changed behind its back."""
+
+import logging
+import os
+
+from core.utils.file_utils import (
+    catalog_file,
+    get_projects_directory,
+    get_sessions_directory,
+    read_file,
+    user_dir_exists,
+    write_file,
+)
+
+logger = logging.getLogger(__name__)
+
+CATALOG_VERSION = 4
+
+
+def journal_size(file_path):
+    """Size of the capture journal next to a session file, 0 if there is none"""
+    try:
+        return os.path.getsize(file_path[:-4] + ".journal")
+    except OSError:
+        return 0
+
+
+def session_row(name, project, summary, file_path):
+    """Build a catalog row from a session summary and its file on disk"""
+    stat = os.stat(file_path)
+    row = dict(summary)
+    row.update({
+        "name": name,
+        "project": project,
+        "mtime": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "journal_size": journal_size(file_path),
+    })
+    return row
+
+
+class SessionCatalog:
+    def __init__(self):
+        self.catalog_path = catalog_file()
+        self.rows = {}  # (project, name) -> row
+        self.signature = {}  # directory path -> mtime_ns
+        self._load()
+
+    def _load(self):
+        """Load the catalog from disk, starting empty if it is missing or unreadable"""
+        if not os.path.exists(self.catalog_path):
+            return
+        try:
+            catalog = read_file(self.catalog_path)
+            if catalog.get("version") != CATALOG_VERSION:
+                logger.info("Session catalog version changed, rebuilding")
+                return
+            self.rows = catalog["rows"]
+            self.signature = catalog["signature"]
+        except Exception as e:
+            logger.warning(f"Could not read session catalog, rebuilding: {e}")
+            self.rows = {}
+            self.signature = {}
+
+    def _save(self):
+        user_dir_exists()
+        try:
+            write_file(self.catalog_path, {
+                "version": CATALOG_VERSION,
+                "signature": self.signature,
+                "rows": self.rows,
+            })
+        except OSError as e:
+            logger.warning(f"Could not write session catalog: {e}")
+
+    def _session_directories(self):
+        """Returns (project, directory) pairs for every place sessions are stored"""
+        directories = [(None, get_sessions_directory())]
+        projects_dir = get_projects_directory()
+        if os.path.exists(projects_dir):
+            with os.scandir(projects_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir() and entry.name != "__pycache__":
+                        directories.append((entry.name, entry.path))
+        return directories
+
+    def _current_signature(self):
+        """Directory mtimes for the sessions directory and each project directory.
+        Adding, removing or renaming a session or a project changes it. The projects
+        directory itself is left out, since projects_metadata.json is rewritten there"""
+        signature = {}
+        for _, path in self._session_directories():
+            try:
+                signature[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                signature[path] = None
+        return signature
+
+    def is_stale(self):
+        return self._current_signature() != self.signature
+
+    def entries(self, loader, check=True):
+        """Returns all catalog rows, rescanning first if the catalog is stale.
+        loader(sessions) gets a list of (name, project) pairs and must return their
+        summaries in the same order, None for those that failed.
+        With check=False the directories are not checked, for when a watcher
+        keeps the catalog up to date"""
+        if check and self.is_stale():
+            self.refresh(loader)
+        return list(self.rows.values())
+
+    def refresh(self, loader):
+        """Rescan the session directories. Rows whose file size, mtime and journal
+        size are unchanged are reused, everything else is loaded through loader at once"""
+        logger.info("Session catalog is stale, rescanning session directories")
+        rows = {}
+        stale = []  # (key, file path)
+        for project, directory in self._session_directories():
+            if not os.path.exists(directory):
+                continue
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".dat") or not entry.is_file():
+                        continue
+                    name = entry.name[:-4]
+                    key = (project, name)
+                    stat = entry.stat()
+                    row = self.rows.get(key)
+                    if (
+                        row is not None
+                        and row["mtime"] == stat.st_mtime_ns
+                        and row["size"] == stat.st_size
+                        and row["journal_size"] == journal_size(entry.path)
+                    ):
+                        rows[key] = row
+                        continue
+                    stale.append((key, entry.path))
+
+        summaries = loader([(name, project) for (project, name), _ in stale]) if stale else []
+        reloaded = 0
+        for ((project, name), file_path), summary in zip(stale, summaries):
+            if summary:
+                try:
+                    rows[(project, name)] = session_row(name, project, summary, file_path)
+                    reloaded += 1
+                except OSError:
+                    pass  # removed while rescanning
+        logger.info(f"Session catalog rescanned: {len(rows)} sessions, {reloaded} reloaded")
+        self.rows = rows
+        self.signature = self._current_signature()
+        self._save()
+
+    def is_current(self, name, project, file_path):
+        """Check if the row of a session still matches its files on disk"""
+        row = self.rows.get((project, name))
+        if row is None:
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        return (row["mtime"] == stat.st_mtime_ns and row["size"] == stat.st_size
+                and row["journal_size"] == journal_size(file_path))
+
+    def invalidate(self):
+        """Force a rescan on the next call to entries()"""
+        self.signature = {}
+
+    def get(self, name, project):
+        """Returns the catalog row of a session, or None if it is not cataloged"""
+        return self.rows.get((project, name))
+
+    def _touch(self, directory):
+        """Accept our own change to a directory without marking the catalog stale.
+        Other directories keep their recorded mtime, so outside changes still show up"""
+        try:
+            self.signature[directory] = os.stat(directory).st_mtime_ns
+        except OSError:
+            self.signature[directory] = None
+
+    def update(self, name, project, summary, file_path):
+        """Record a saved session"""
+        try:
+            self.rows[(project, name)] = session_row(name, project, summary, file_path)
+        except OSError as e:
+            logger.warning(f"Could not catalog session {name}: {e}")
+            return
+        self._touch(os.path.dirname(file_path))
+        self._save()
+
+    def remove(self, name, project, directory):
+        """Forget a deleted or moved session"""
+        self.rows.pop((project, name), None)
+        self._touch(directory)
+        self._save()
@@ -0,0 +1,235 @@
+"""Watches the Sessions and Projects directories for changes to session files, so
+open screens can update only the sessions that changed. Uses inotify on Linux and
+falls back to polling file mtimes everywhere else."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+
+from core.utils.file_utils import get_projects_directory, get_sessions_directory
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Changes are reported as (project, name) keys: project is None for standalone
+# sessions, name is None when the project itself changed (created, deleted or
+# its metadata rewritten). RESCAN means events were lost and everything must be reloaded
+RESCAN = ("*", "*")
+METADATA_FILE = "projects_metadata.json"
+POLL_SECONDS = 2.0
+
+# inotify constants from <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+              | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+
+def session_key(project, file_name):
+    """The change key of a file in a session directory, or None if the file is
+    not part of a session (temporary files, hash files of v1/v2 sessions...)"""
+    if file_name.endswith(".dat"):
+        return project, file_name[:-4]
+    if file_name.endswith(".journal"):
+        return project, file_name[:-8]
+    return None
+
+
+class _InotifyBackend:
+    """Linux inotify through ctypes, one watch per session directory"""
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}  # wd -> project, "" for the projects directory
+        try:
+            self._add_watch(get_sessions_directory(), None)
+            self._add_watch(get_projects_directory(), "")
+            with os.scandir(get_projects_directory()) as entries:
+                for entry in entries:
+                    if entry.is_dir() and entry.name != "__pycache__":
+                        self._add_watch(entry.path, entry.name)
+        except OSError:
+            os.close(self.fd)
+            raise
+
+    def _add_watch(self, path, project):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        self.watches[wd] = project
+
+    def wait(self, timeout):
+        """Block until changes arrive or timeout passes. Returns a set of change keys"""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        changes = set()
+        offset = 0
+        while offset + INOTIFY_EVENT.size <= len(buffer):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(buffer, offset)
+            offset += INOTIFY_EVENT.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                changes.add(RESCAN)
+                continue
+            if mask & IN_IGNORED:
+                self.watches.pop(wd, None)
+                continue
+            if wd not in self.watches:
+                continue
+            project = self.watches[wd]
+            if project == "":
+                # The projects directory: projects come and go, metadata is rewritten
+                if mask & IN_ISDIR and name != "__pycache__":
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        path = os.path.join(get_projects_directory(), name)
+                        try:
+                            self._add_watch(path, name)
+                            # Files may have been added before the watch was
+                            with os.scandir(path) as entries:
+                                changes.update(k for k in (session_key(name, e.name) for e in entries) if k)
+                        except OSError as e:
+                            logger.warning(f"Could not watch project {name}: {e}")
+                    changes.add((name, None))
+                elif name == METADATA_FILE:
+                    changes.add((None, None))
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                continue  # reported through the projects directory
+            key = session_key(project, name)
+            if key is not None:
+                changes.add(key)
+        return changes
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """Compares a snapshot of the session directories every POLL_SECONDS"""
+    def __init__(self, stop_event):
+        self.stop_event = stop_event
+        self.snapshot = self._scan()
+
+    def _scan(self):
+        """(project, file name) -> (mtime_ns, size) of every session related file,
+        with (project, None) entries for the projects and the metadata file"""
+        snapshot = {}
+        directories = [(None, get_sessions_directory())]
+        projects_dir = get_projects_directory()
+        if os.path.exists(projects_dir):
+            with os.scandir(projects_dir) as entries:
+                for entry in entries:
+                    if entry.is_dir() and entry.name != "__pycache__":
+                        directories.append((entry.name, entry.path))
+                        snapshot[(entry.name, None)] = None
+                    elif entry.name == METADATA_FILE:
+                        stat = entry.stat()
+                        snapshot[(None, None)] = (stat.st_mtime_ns, stat.st_size)
+        for project, directory in directories:
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if session_key(project, entry.name) is not None:
+                            stat = entry.stat()
+                            snapshot[(project, entry.name)] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+        return snapshot
+
+    def wait(self, timeout):
+        if self.stop_event.wait(max(timeout, POLL_SECONDS)):
+            return set()
+        snapshot = self._scan()
+        changes = set()
+        for key in snapshot.keys() | self.snapshot.keys():
+            if snapshot.get(key, False) != self.snapshot.get(key, False):
+                project, file_name = key
+                changes.add(key if file_name is None else session_key(project, file_name))
+        self.snapshot = snapshot
+        return changes
+
+    def close(self):
+        pass
+
+
+class SessionWatcher:
+    def __init__(self, parent, logic_controller):
+        self.parent = parent
+        self.logic = logic_controller
+        self.lock = threading.Lock()
+        self.pending = set()
+        self.stop_event = threading.Event()
+        self.backend = None
+        self.thread = None
+
+    def start(self):
+        """Start watching in a background thread"""
+        if self.thread is not None:
+            return
+        if sys.platform.startswith("linux"):
+            try:
+                self.backend = _InotifyBackend()
+                logger.info("Watching session directories with inotify")
+            except (OSError, AttributeError) as e:
+                logger.warning(f"inotify unavailable, polling session directories instead: {e}")
+        if self.backend is None:
+            self.backend = _PollingBackend(self.stop_event)
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._watch, name="session_watcher", daemon=True)
+        self.thread.start()
+
+    def _watch(self):
+        try:
+            while not self.stop_event.is_set():
+                changes = self.backend.wait(0.5)
+                if changes:
+                    with self.lock:
+                        self.pending |= changes
+        except Exception as e:
+            logger.error(f"Session watcher stopped: {e}")
+            with self.lock:
+                self.pending.add(RESCAN)
+        finally:
+            self.backend.close()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def drain(self):
+        """Returns and clears the change keys collected since the last call"""
+        with self.lock:
+            changes = self.pending
+            self.pending = set()
+        return changes
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=1)
+            self.thread = None
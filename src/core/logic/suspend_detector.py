@@ -0,0 +1,143 @@
+"""
+Detects system suspends. Every platform keeps a clock that counts time asleep and
+one that does not, so the time spent suspended is the growing difference between
+the two: CLOCK_BOOTTIME and CLOCK_MONOTONIC on Linux, CLOCK_MONOTONIC and
+CLOCK_UPTIME_RAW on macOS, GetTickCount64 and QueryUnbiasedInterruptTime on
+Windows. Checking costs two clock reads, so it is done whenever the tracked time is
+asked for instead of on a thread of its own.
+
+On Linux, if jeepney is installed, logind's PrepareForSleep signal is also listened
+to, so the pause covering a suspend starts exactly when the machine went to sleep.
+One listener thread serves every detector, e.g. those of the tracking engine's
+sessions.
+"""
+
+import sys
+import threading
+import time
+import weakref
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Shorter gaps are clock jitter, not suspends
+MIN_SUSPEND_SECONDS = 2.0
+
+# Detectors told about logind's PrepareForSleep signal, by the shared listener
+_listening_detectors = weakref.WeakSet()
+_listener_lock = threading.Lock()
+_listener = None
+
+
+def _windows_sleep_clocks():
+    import ctypes
+
+    kernel32 = ctypes.windll.kernel32
+    kernel32.GetTickCount64.restype = ctypes.c_ulonglong
+    unbiased = ctypes.c_ulonglong()
+
+    def read():
+        kernel32.QueryUnbiasedInterruptTime(ctypes.byref(unbiased))
+        return kernel32.GetTickCount64() / 1000, unbiased.value / 10_000_000
+    return read
+
+
+def sleep_clocks():
+    """A function returning (seconds including time asleep, seconds awake), None
+    if the platform has no such clocks"""
+    try:
+        if sys.platform.startswith("linux"):
+            read = lambda: (time.clock_gettime(time.CLOCK_BOOTTIME), time.clock_gettime(time.CLOCK_MONOTONIC))  # noqa: E731
+        elif sys.platform == "darwin":
+            read = lambda: (time.clock_gettime(time.CLOCK_MONOTONIC), time.clock_gettime(time.CLOCK_UPTIME_RAW))  # noqa: E731
+        elif sys.platform == "win32":
+            read = _windows_sleep_clocks()
+        else:
+            return None
+        read()
+        return read
+    except (AttributeError, OSError) as e:
+        logger.info(f"Suspend detection unavailable: {e}")
+        return None
+
+
+class SuspendDetector:
+    def __init__(self):
+        self.read_clocks = sleep_clocks()
+        self.lock = threading.Lock()
+        self.sleep_started = None  # wall clock, from logind
+        self.last = self._read()
+
+    def _read(self):
+        """(wall clock, monotonic clock, clock including time asleep, awake clock)"""
+        if self.read_clocks is None:
+            return None
+        return (time.time(), time.monotonic(), *self.read_clocks())
+
+    def check(self):
+        """Returns (wall clock start, seconds asleep, of which seconds counted by the
+        monotonic clock) of a suspend since the last check, or None"""
+        with self.lock:
+            if self.last is None:
+                return None
+            now = self._read()
+            last, self.last = self.last, now
+            asleep = (now[2] - last[2]) - (now[3] - last[3])
+            if asleep < MIN_SUSPEND_SECONDS:
+                return None
+            # time.monotonic() excludes suspends on Linux and macOS, but may not elsewhere
+            counted = min(max((now[1] - last[1]) - (now[3] - last[3]), 0.0), asleep)
+            start = last[0]
+            if self.sleep_started is not None and last[0] <= self.sleep_started <= now[0]:
+                start = self.sleep_started
+            self.sleep_started = None
+        logger.info(f"System was suspended for {asleep:.0f}s")
+        return start, asleep, counted
+
+    def reset(self):
+        """Only report suspends from now on"""
+        with self.lock:
+            self.last = self._read()
+
+    def listen_to_logind(self):
+        """Listen for logind's PrepareForSleep signal. The listener thread blocks on
+        the system bus and only wakes up when the machine suspends; it is started by
+        the first detector and shared by all later ones"""
+        global _listener
+        if self.read_clocks is None or not sys.platform.startswith("linux"):
+            return
+        with _listener_lock:
+            _listening_detectors.add(self)
+            if _listener is not None:
+                return
+            try:
+                from jeepney import MatchRule, message_bus  # type: ignore
+                from jeepney.io.blocking import open_dbus_connection  # type: ignore
+            except ImportError:
+                return
+            rule = MatchRule(
+                type="signal",
+                sender="org.freedesktop.login1",
+                interface="org.freedesktop.login1.Manager",
+                member="PrepareForSleep",
+                path="/org/freedesktop/login1",
+            )
+
+            def listen():
+                try:
+                    with open_dbus_connection(bus="SYSTEM") as connection:
+                        connection.send_and_get_reply(message_bus.AddMatch(rule))
+                        with connection.filter(rule) as queue:
+                            while True:
+                                going_to_sleep = connection.recv_until_filtered(queue).body[0]
+                                if going_to_sleep:
+                                    sleep_started = time.time()
+                                    with _listener_lock:
+                                        detectors = list(_listening_detectors)
+                                    for detector in detectors:
+                                        detector.sleep_started = sleep_started
+                except Exception as e:
+                    logger.info(f"Stopped listening to logind: {e}")
+
+            _listener = threading.Thread(target=listen, name="logind_listener", daemon=True)
+            _listener.start()
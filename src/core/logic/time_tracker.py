@@ -1,86 +1,165 @@
 import logging
+import threading
 import time
 
-from core.utils.logic_utils import threaded
+from core.logic.suspend_detector import SuspendDetector
+from core.utils.file_utils import (
+    JOURNAL_FOCUS,
+    JOURNAL_START,
+    JOURNAL_STOP,
+    PAUSE_JOURNAL_KINDS,
+    PAUSE_MANUAL,
+    PAUSE_SUSPEND,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class TimeTracker:
-    """A clock that runs in a separate thread to track elapsed time,
-    with pause and resume functionality."""
-
-    def __init__(self, parent, logic_controller):
+    """Tracks elapsed time with pause and resume functionality. Elapsed time is
+    computed when asked for from the monotonic clock, so it is exact and immune to
+    wall clock changes; wall clock timestamps are only stored in the captures.
+    System suspends are found whenever the time is asked for and recorded as pauses.
+    The state is changed under a lock, as the GUI, the mouse tracker and the
+    checkpointer all use the tracker from threads of their own.
+    Captures go to the foreground session's journal, or to the given SessionJournal
+    for the sessions of the tracking engine."""
+
+    def __init__(self, parent, logic_controller, journal=None):
         self.parent = parent
 
         # note: logic controller is defined as the only controller
         self.controller = logic_controller
+        self.journal = journal
+        # Reentrant: asking for the time checks for suspends, which may add a pause
+        self.lock = threading.RLock()
 
         self.track = False
-        self.start_time = None
-        self.elapsed_time = 0.0
         self.total_time = 0.0
-        self.paused_time = 0.0
+        self.paused_time = 0.0  # wall clock, for the captures
         self.resumed_time = 0.0
-        self.offset_time = 0.0
         self.is_paused = False
 
+        # monotonic clock readings
+        self.start_time = None
+        self.stop_time = None
+        self.pause_start = None
+        self.active_since = None  # start of the current run, or end of its last pause
+        self.pause_reason = PAUSE_MANUAL
+        self.offset_time = 0.0  # time paused
+        self.pause_asleep = 0.0  # time suspended while paused, not on the monotonic clock
+
+        self.suspend_detector = SuspendDetector()
+        self.suspend_detector.listen_to_logind()
+
         # time captures for data analysis are saved in the following format:
-        # {'starts': [], 'stops': [], 'pauses': [{start: 0, how_long: 0}, ...]}
+        # {'starts': [], 'stops': [], 'pauses': [{start: 0, how_long: 0, reason: PAUSE_MANUAL}, ...]}
+        # and, when the focus tracker runs, 'focus': [{start: 0, how_long: 0}, ...]
         self.captures = {"starts": [], "stops": [], "pauses": []}
 
-    @threaded
-    def clock(self):
-        """This method runs in a separate
-        thread and updates the elapsed time."""
-        self.start_time = time.time()
-        while self.track:
-            # time does not elapse when paused
-            if not self.is_paused:
-                self.elapsed_time = time.time() - self.start_time - self.offset_time
-            # sleep needs to be kept low here for accuracy
-            time.sleep(0.1)
-
     def start(self):
-        self.track = True
-        self.captures["starts"].append(time.time())
-        logger.info("Starting time tracker")
+        with self.lock:
+            self.track = True
+            self.start_time = time.monotonic()
+            self.active_since = self.start_time
+            self.stop_time = None
+            self.suspend_detector.reset()
+            start_time = time.time()
+            self.captures["starts"].append(start_time)
+            self._journal(JOURNAL_START, start_time)
+            logger.info("Starting time tracker")
 
     def stop(self):
-        if self.track:
-            self.captures["stops"].append(time.time())
-            logger.info("Stopping time tracker")
-            self.track = False
-
-    def pause(self):
-        if self.track and not self.is_paused:
-            self.is_paused = True
-            self.paused_time = time.time()
-            logger.info("Pausing time tracker")
+        with self.lock:
+            self._check_suspend()
+            if self.track:
+                self.stop_time = time.monotonic()
+                stop_time = time.time()
+                self.captures["stops"].append(stop_time)
+                self._journal(JOURNAL_STOP, stop_time)
+                logger.info("Stopping time tracker")
+                self.track = False
+
+    def pause(self, since=None, reason=PAUSE_MANUAL):
+        """Pauses the tracker. since backdates the pause to an earlier monotonic clock
+        reading, e.g. the last input before the user went idle; it is limited to
+        the time tracked since the last pause"""
+        with self.lock:
+            self._check_suspend()
+            if self.track and not self.is_paused:
+                now = time.monotonic()
+                self.pause_start = now if since is None else min(max(since, self.active_since), now)
+                self.pause_asleep = 0.0
+                self.pause_reason = reason
+                self.paused_time = time.time() - (now - self.pause_start)
+                self.is_paused = True
+                logger.info(f"Pausing time tracker ({reason})")
 
     def resume(self):
         """Resumes the tracker, subtracts the time paused."""
-        if self.track and self.is_paused:
-            self.is_paused = False
-            self.resumed_time = time.time()
-            self.offset_time += self.resumed_time - self.paused_time
-            self.captures["pauses"].append(
-                {
-                    "start": self.paused_time,
-                    "how_long": self.resumed_time - self.paused_time,
-                }
-            )
-            logger.info("Resuming time tracker")
+        with self.lock:
+            self._check_suspend()
+            if self.track and self.is_paused:
+                self.is_paused = False
+                self.resumed_time = time.time()
+                self.active_since = time.monotonic()
+                how_long = self.active_since - self.pause_start
+                self.offset_time += how_long
+                self._add_pause(self.paused_time, how_long + self.pause_asleep, self.pause_reason)
+                logger.info("Resuming time tracker")
+
+    def _add_pause(self, start, how_long, reason):
+        self.captures["pauses"].append(
+            {
+                "start": start,
+                "how_long": how_long,
+                "reason": reason,
+            }
+        )
+        self._journal(PAUSE_JOURNAL_KINDS[reason], start, how_long)
+
+    def _journal(self, kind, a, b=0.0):
+        if self.journal is not None:
+            self.journal.capture(kind, a, b)
+        else:
+            self.controller.file_handler.journal_capture(kind, a, b)
+
+    def _check_suspend(self):
+        """Record a system suspend since the last check as a pause"""
+        with self.lock:
+            suspend = self.suspend_detector.check()
+            if suspend is None or not self.track:
+                return
+            start, asleep, counted = suspend
+            if self.is_paused:
+                # Falls within the current pause, which has to span the whole suspend
+                self.pause_asleep += asleep - counted
+                return
+            self.offset_time += counted
+            self.active_since = time.monotonic()  # idle pauses must not overlap it
+            self._add_pause(start, asleep, PAUSE_SUSPEND)
+
+    def add_focus(self, start, how_long):
+        """Record an interval during which the tracked app had the input focus"""
+        with self.lock:
+            self.captures.setdefault("focus", []).append({"start": start, "how_long": how_long})
+            self._journal(JOURNAL_FOCUS, start, how_long)
 
     def reset(self, add_time=0.0):
-        self.elapsed_time = 0.0
-        self.offset_time = 0.0
-        self.paused_time = 0.0
-        self.resumed_time = 0.0
-        self.total_time = add_time
-        self.track = False
-        self.start_time = None
-        self.captures = {"starts": [], "stops": [], "pauses": []}
+        with self.lock:
+            self.offset_time = 0.0
+            self.paused_time = 0.0
+            self.resumed_time = 0.0
+            self.total_time = add_time
+            self.track = False
+            self.is_paused = False
+            self.start_time = None
+            self.stop_time = None
+            self.pause_start = None
+            self.active_since = None
+            self.pause_reason = PAUSE_MANUAL
+            self.pause_asleep = 0.0
+            self.captures = {"starts": [], "stops": [], "pauses": []}
         logger.info(
             "Continuing Session: "
             + f"{self.controller.file_handler.get_continuing_session()}"
@@ -104,19 +183,34 @@ class TimeTracker:
     def get_is_paused(self):
         return self.is_paused
 
+    def get_pause_reason(self):
+        return self.pause_reason
+
     def get_time(self, saved=False):
         if not self.track and saved is False:
             return None
-        return self.elapsed_time
+        return self.get_elapsed_time()
 
     def get_total_time(self):
-        return self.total_time + self.elapsed_time
+        with self.lock:
+            return self.total_time + self.get_elapsed_time()
 
     def get_paused_time(self):
         return self.paused_time
 
     def get_elapsed_time(self):
-        return self.elapsed_time
+        """Time tracked since start, time does not elapse when paused"""
+        with self.lock:
+            if self.start_time is None:
+                return 0.0
+            self._check_suspend()
+            if self.is_paused:
+                end = self.pause_start
+            elif not self.track:
+                end = self.stop_time
+            else:
+                end = time.monotonic()
+            return end - self.start_time - self.offset_time
 
     def get_time_captures(self):
         return self.captures
@@ -0,0 +1,213 @@
+"""
+Tracks several apps at once, each in a background session of its own next to the
+session tracked in the foreground. Every session has its own TimeTracker journaling
+to its own SessionJournal, so pauses, suspends and the capture journal work as they
+do in the foreground. One thread resolves every tracked app from a single process
+scan per tick, so tracking many apps costs about as much as tracking one. A session
+starts when its app is found running and stops when the whole process tree of the
+app has exited; it is then kept until it is saved or discarded.
+"""
+
+import os
+import threading
+
+from core.logic.file_handler import SessionJournal
+from core.logic.time_tracker import TimeTracker
+from core.utils.file_utils import config_file, read_file, session_directory
+from _version import __version__
+
+import logging
+logger = logging.getLogger(__name__)
+
+TICK_SECONDS = 1.0
+
+
+class TrackedSession:
+    """One background session of the tracking engine"""
+    def __init__(self, logic_controller, app_name, session_name, project_name=None):
+        self.logic = logic_controller
+        self.app_name = app_name
+        self.session_name = session_name
+        self.project_name = project_name
+        self.lock = threading.Lock()
+        self.closed = False  # saved or discarded, never started again
+        self.data = {}  # saved data of a continued session
+        self.journal = SessionJournal(session_name, project_name)
+        self.time_tracker = TimeTracker(None, logic_controller, journal=self.journal)
+
+    @property
+    def key(self):
+        return self.project_name, self.session_name
+
+    def load(self):
+        """Continue the session if it was saved before"""
+        directory = session_directory(self.project_name)
+        if not os.path.exists(os.path.join(directory, self.session_name + ".dat")):
+            return
+        _, _, data = self.logic.file_handler.load_sessions([(self.session_name, self.project_name)])[0]
+        if not isinstance(data, dict):
+            raise ValueError(f"Session {self.session_name} cannot be continued, it could not be loaded")
+        self.data = data
+        self.time_tracker.total_time = data.get("time_spent", 0.0)
+        captures = data.get("time_captures") or {}
+        self.time_tracker.captures = {
+            key: list(value) for key, value in captures.items()
+        }
+        for key in ("starts", "stops", "pauses"):
+            self.time_tracker.captures.setdefault(key, [])
+
+    def start(self):
+        with self.lock:
+            if self.closed or self.time_tracker.start_time is not None:
+                return
+            self.time_tracker.start()
+        logger.info(f"Tracking {self.app_name} in session {self.session_name}")
+
+    def stop(self):
+        """Stop tracking, closing the current pause"""
+        with self.lock:
+            if not self.time_tracker.is_running():
+                return
+            self.time_tracker.resume()
+            self.time_tracker.stop()
+        logger.info(f"Stopped tracking {self.app_name} in session {self.session_name}")
+
+    def pause(self):
+        self.time_tracker.pause()
+
+    def resume(self):
+        self.time_tracker.resume()
+
+    def is_running(self):
+        return self.time_tracker.is_running()
+
+    def is_started(self):
+        return self.time_tracker.start_time is not None
+
+    def is_finished(self):
+        return self.closed or self.time_tracker.stop_time is not None
+
+    def is_paused(self):
+        return self.time_tracker.get_is_paused()
+
+    def get_total_time(self):
+        return self.time_tracker.get_total_time()
+
+    def get_data(self):
+        """The session data to save, the saved data of a continued session with the
+        time and captures of this run"""
+        try:
+            config = read_file(config_file())
+        except FileNotFoundError:
+            config = {}
+        data = dict(self.data)
+        data.update({
+            "app_name": self.app_name,
+            "time_spent": self.get_total_time(),
+            "session_version": self.data.get("session_version", "1.0") if self.data
+            else ".".join(__version__.split(".")[:2]),
+            "config": config,
+            "time_captures": self.time_tracker.get_time_captures(),
+        })
+        return data
+
+
+class TrackingEngine:
+    def __init__(self, parent, logic_controller):
+        self.parent = parent
+        self.logic = logic_controller
+        self.lock = threading.Lock()
+        self.sessions = {}  # (project, session name) -> TrackedSession
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def add_session(self, app_name, session_name, project_name=None):
+        """Track an app in a new or continued background session. Tracking starts
+        once the app is found running. Returns the TrackedSession"""
+        file_handler = self.logic.file_handler
+        if (
+            self.logic.time_tracker.start_time is not None
+            and (file_handler.get_file_name(), file_handler.get_current_project()) == (session_name, project_name)
+        ):
+            raise ValueError(f"Session {session_name} is being tracked in the foreground")
+        with self.lock:
+            if (project_name, session_name) in self.sessions:
+                raise ValueError(f"Session {session_name} is already being tracked")
+        session = TrackedSession(self.logic, app_name, session_name, project_name)
+        session.load()
+        with self.lock:
+            if session.key in self.sessions:
+                raise ValueError(f"Session {session_name} is already being tracked")
+            self.sessions[session.key] = session
+        self._start()
+        return session
+
+    def get_sessions(self):
+        with self.lock:
+            return list(self.sessions.values())
+
+    def is_tracking(self, session_name, project_name=None):
+        with self.lock:
+            return (project_name, session_name) in self.sessions
+
+    def _start(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.stop_event.clear()
+            self.thread = threading.Thread(target=self._run, name="tracking_engine", daemon=True)
+            self.thread.start()
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logger.error(f"Tracking engine tick failed: {e}")
+            self.stop_event.wait(TICK_SECONDS)
+
+    def tick(self):
+        """Start the sessions whose app appeared and stop those whose app exited,
+        all from a single process scan"""
+        sessions = [session for session in self.get_sessions() if not session.is_finished()]
+        if not sessions:
+            return
+        trees = self.logic.app_tracker.get_app_trees({session.app_name for session in sessions})
+        for session in sessions:
+            if trees[session.app_name]:
+                session.start()
+            elif session.is_running():
+                session.stop()
+
+    def _remove(self, session):
+        with self.lock:
+            self.sessions.pop(session.key, None)
+
+    def save_session(self, session):
+        """Stop a session if it still runs, save it and stop tracking it"""
+        with session.lock:
+            session.closed = True
+        session.stop()
+        self.logic.file_handler.save_session_as(session.session_name, session.project_name, session.get_data())
+        self._remove(session)
+
+    def discard_session(self, session):
+        """Stop tracking a session without saving this run"""
+        with session.lock:
+            session.closed = True
+        session.stop()
+        session.journal.discard()
+        self._remove(session)
+
+    def stop(self):
+        """Save every session that tracked some time and stop the engine"""
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=TICK_SECONDS * 2)
+            self.thread = None
+        for session in self.get_sessions():
+            if not session.is_started():
+                self._remove(session)
+                continue
+            try:
+                self.save_session(session)
+            except Exception as e:
+                logger.error(f"Could not save session {session.session_name}: {e}")
@@ -0,0 +1,173 @@
+"""
+Background usage recorder. While enabled, records the time every app is running,
+and on X11 the time it is in the foreground, into one compact usage file per day,
+independently of sessions. Running apps come from the app list the AppTracker
+already keeps up to date, so recording adds no process scans of its own.
+Intervals are buffered in memory and appended in batches.
+"""
+
+import datetime
+import sys
+import threading
+import time
+
+from core.utils.file_utils import (
+    USAGE_FOREGROUND,
+    USAGE_RUNNING,
+    append_usage_intervals,
+    config_file,
+    read_file,
+    read_usage_file,
+    truncate_usage_file,
+    usage_file,
+)
+from core.logic.focus_tracker import X11FocusBackend
+
+import logging
+logger = logging.getLogger(__name__)
+
+RECORD_TICK_SECONDS = 1.0
+# Buffered intervals are written, and the open ones split, this often. About one
+# 12 byte record per running app per flush: 50 apps running all day take ~60 KB
+FLUSH_SECONDS = 900
+# A tick this late means the machine was suspended, the gap is not recorded
+SUSPEND_GAP_SECONDS = 10 * RECORD_TICK_SECONDS
+
+
+def _split_at_midnight(start, end):
+    """Yield (day, start, end) parts of an interval, one per local day"""
+    while True:
+        day = datetime.date.fromtimestamp(start)
+        midnight = datetime.datetime.combine(day + datetime.timedelta(days=1), datetime.time()).timestamp()
+        if end <= midnight:
+            yield day, start, end
+            return
+        yield day, start, midnight
+        start = midnight
+
+
+def usage_totals(day):
+    """{app name: {USAGE_RUNNING: seconds, USAGE_FOREGROUND: seconds}} of a day"""
+    totals = {}
+    for app_name, kind, _, duration in read_usage_file(usage_file(day))[1]:
+        app_totals = totals.setdefault(app_name, {USAGE_RUNNING: 0, USAGE_FOREGROUND: 0})
+        app_totals[kind] = app_totals.get(kind, 0) + duration
+    return totals
+
+
+class UsageRecorder:
+    def __init__(self, parent, logic_controller):
+        self.parent = parent
+        self.logic = logic_controller
+        self.stop_event = threading.Event()
+        self.update_thread = None
+        self.open = {USAGE_RUNNING: {}, USAGE_FOREGROUND: {}}  # kind -> {app name: start}
+        self.pending = []  # closed (app name, kind, start, end) intervals
+        self.day_names = {}  # day last written -> app names already in its usage file
+        try:
+            self.enabled = read_file(config_file())["background_recording"]
+        except (FileNotFoundError, KeyError):
+            self.enabled = False  # Default value
+
+    def start(self):
+        if self.enabled and self.update_thread is None:
+            self.stop_event.clear()
+            self.update_thread = threading.Thread(target=self._record, name="usage_recorder", daemon=True)
+            self.update_thread.start()
+            logger.info("Background usage recording started.")
+
+    def stop(self):
+        self.stop_event.set()
+        if self.update_thread is not None:
+            self.update_thread.join(timeout=RECORD_TICK_SECONDS * 2)
+            self.update_thread = None
+            logger.info("Background usage recording stopped.")
+
+    def set_enabled(self, enabled):
+        self.enabled = enabled
+        if enabled:
+            self.start()
+        else:
+            self.stop()
+
+    def _focus_backend(self):
+        if not sys.platform.startswith("linux"):
+            return None
+        try:
+            return X11FocusBackend()
+        except Exception as e:
+            logger.info(f"Foreground usage unavailable, recording running time only: {e}")
+            return None
+
+    def _record(self):
+        backend = self._focus_backend()
+        foreground = set()
+        last_tick = last_flush = time.time()
+        try:
+            if backend is not None:
+                foreground = self._foreground_app(backend)
+            while not self.stop_event.is_set():
+                if backend is not None:
+                    if backend.wait(RECORD_TICK_SECONDS):
+                        foreground = self._foreground_app(backend)
+                elif self.stop_event.wait(RECORD_TICK_SECONDS):
+                    break
+                now = time.time()
+                if now - last_tick > SUSPEND_GAP_SECONDS:
+                    # Asleep since the last tick, close everything at that point
+                    self._close_all(last_tick)
+                last_tick = now
+                self._update(USAGE_RUNNING, set(self.logic.app_tracker.get_app_names()), now)
+                self._update(USAGE_FOREGROUND, foreground, now)
+                if now - last_flush >= FLUSH_SECONDS:
+                    self._flush(now)
+                    last_flush = now
+        except Exception as e:
+            logger.error(f"Background usage recording stopped: {e}")
+        finally:
+            if backend is not None:
+                backend.close()
+            self._close_all(time.time())
+            self._flush(time.time())
+
+    def _foreground_app(self, backend):
+        pid = backend.active_pid()
+        app_name = self.logic.app_tracker.get_app_of_pid(pid) if pid is not None else None
+        return {app_name} if app_name else set()
+
+    def _update(self, kind, apps, now):
+        """Open intervals for apps that appeared, close those of apps that are gone"""
+        open_intervals = self.open[kind]
+        for app_name in open_intervals.keys() - apps:
+            self.pending.append((app_name, kind, open_intervals.pop(app_name), now))
+        for app_name in apps - open_intervals.keys():
+            open_intervals[app_name] = now
+
+    def _close_all(self, now):
+        for kind in self.open:
+            self._update(kind, set(), now)
+
+    def _flush(self, now):
+        """Write the buffered intervals and the open ones up to now, one append per day file"""
+        for kind, open_intervals in self.open.items():
+            for app_name, start in open_intervals.items():
+                self.pending.append((app_name, kind, start, now))
+                open_intervals[app_name] = now
+        by_day = {}
+        for app_name, kind, start, end in self.pending:
+            for day, part_start, part_end in _split_at_midnight(start, end):
+                # Whole seconds, cut at whole seconds so split intervals add up
+                duration = int(part_end) - int(part_start)
+                if duration > 0:
+                    by_day.setdefault(day, []).append((app_name, kind, part_start, duration))
+        self.pending = []
+        for day, intervals in by_day.items():
+            try:
+                if day not in self.day_names:
+                    # First append of the day, after a torn record of a crash if any
+                    names, _, end = read_usage_file(usage_file(day))
+                    truncate_usage_file(usage_file(day), end)
+                    self.day_names = {day: names}
+                append_usage_intervals(usage_file(day), self.day_names[day], intervals)
+            except OSError as e:
+                logger.warning(f"Could not write usage file of {day}: {e}")
@@ -4,27 +4,33 @@ the timer during the session.
 """
 
 import threading
+import time
 import pynput # type: ignore
 
-from core.utils.file_utils import read_file, config_file
+from core.utils.file_utils import PAUSE_IDLE, read_file, config_file
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Input events closer together than this only count as one activity
+ACTIVITY_COALESCE_SECONDS = 0.25
+
 class MouseTracker:
-    """Tracks mouse movement over a user configurable time frame."""
+    """Pauses the timer when there was no mouse or keyboard input for a user
+    configurable time frame. Input events only record the time of the last
+    activity; a single timer waits until the idle deadline passes."""
     def __init__(self, parent, logic_controller):
         self.parent = parent
         try:
             self.idle_time_limit = read_file(config_file())["mouse_idle_time_limit"]
         except (FileNotFoundError, KeyError):
             self.idle_time_limit = 90  # Default value
-        x = 0
-        y = 0
         self.logic = logic_controller
-        self.mouse_position = x, y
-        self.last_mouse_position = x, y
+        self.last_activity = time.monotonic()
+        self.idle_since = self.last_activity  # last activity before pausing
         self.stop_event = threading.Event()  # Used to stop the thread gracefully
+        self.wake_event = threading.Event()  # Set on stop, and on activity while pausing
+        self.listeners = []
         try:
             self.enabled = read_file(config_file())["mouse_tracker_enabled"]
         except (FileNotFoundError, KeyError):
@@ -32,56 +38,97 @@ class MouseTracker:
 
         self.pausing = False
 
-        self.update_thread = threading.Thread(target=self._update_mouse_position, name="mouse_tracker")
-
-    def _check_mouse_position(self):
-        """Perform a single mouse position check and trigger pause/resume as needed."""
-        self.last_mouse_position = self.mouse_position
-
-        x, y = pynput.mouse.Controller().position
-        self.mouse_position = x, y
-
-        # Pause the timer if mouse hasn't moved
-        if self.last_mouse_position == self.mouse_position and not self.logic.time_tracker.get_is_paused():
-            self.logic.time_tracker.pause()
-            self.pausing = True
-        elif self.pausing and self.last_mouse_position != self.mouse_position:
-            self.logic.time_tracker.resume()
-            self.pausing = False
-
-    def _update_mouse_position(self):
-        while not self.stop_event.is_set():
-            wait_time = self.idle_time_limit if not self.logic.time_tracker.get_is_paused() else 1
-
-            # Wait for the idle time or exit early if stop_event is set
-            if self.stop_event.wait(timeout=wait_time):
-                break
-
-            self._check_mouse_position()
-
+        self.update_thread = None
+
+    def _on_activity(self, *args):
+        """Input event callback, runs on the pynput listener threads"""
+        now = time.monotonic()
+        if now - self.last_activity < ACTIVITY_COALESCE_SECONDS:
+            return
+        self.last_activity = now
+        if self.pausing:
+            self.wake_event.set()
+
+    def _start_listeners(self):
+        self.listeners = [
+            pynput.mouse.Listener(on_move=self._on_activity, on_click=self._on_activity, on_scroll=self._on_activity),
+            pynput.keyboard.Listener(on_press=self._on_activity),
+        ]
+        for listener in self.listeners:
+            listener.daemon = True
+            listener.start()
+
+    def _stop_listeners(self):
+        for listener in self.listeners:
+            listener.stop()
+        self.listeners = []
+
+    def _watch_idle(self):
+        try:
+            self._start_listeners()
+        except Exception as e:
+            logger.error(f"Input idle detection unavailable: {e}")
+            self._stop_listeners()
+            return
+        try:
+            while not self.stop_event.is_set():
+                if self.pausing:
+                    # Resume on the first activity, which may have come while pausing
+                    if self.last_activity <= self.idle_since:
+                        self.wake_event.wait()
+                        self.wake_event.clear()
+                    if not self.stop_event.is_set() and self.last_activity > self.idle_since:
+                        self.logic.time_tracker.resume()
+                        self.pausing = False
+                    continue
+
+                # Sleep until the idle deadline, later if there was activity meanwhile
+                remaining = self.last_activity + self.idle_time_limit - time.monotonic()
+                if remaining > 0:
+                    self.wake_event.wait(timeout=remaining)
+                    self.wake_event.clear()
+                    continue
+
+                if not self.logic.time_tracker.get_is_paused():
+                    # Idle since the last input, not since the deadline passed. Pausing
+                    # is set first, so input during the pause call wakes us up
+                    self.idle_since = self.last_activity
+                    self.pausing = True
+                    self.logic.time_tracker.pause(since=self.idle_since, reason=PAUSE_IDLE)
+                else:
+                    # Paused by the user, check again one idle time frame later
+                    self.last_activity = time.monotonic()
+        finally:
+            self._stop_listeners()
 
     def start(self):
-        if self.enabled:
-            self.stop_event = threading.Event()  # Reset the stop event to allow the thread to run again
-            self.update_thread = threading.Thread(target=self._update_mouse_position, name="mouse_tracker")
+        if self.enabled and (self.update_thread is None or not self.update_thread.is_alive()):
+            self.stop_event.clear()
+            self.wake_event.clear()
+            self.last_activity = time.monotonic()
+            self.update_thread = threading.Thread(target=self._watch_idle, name="mouse_tracker")
             self.update_thread.start()
             logging.info("Mouse tracker started.")
 
     def stop(self):
         self.stop_event.set()
+        self.wake_event.set()
         if self.update_thread is not None:
             try:
                 self.update_thread.join()
                 logging.info("Mouse tracker stopped.")
             except RuntimeError:
                 pass
-    
+            self.update_thread = None
+        self.pausing = False
+
     def set_enabled(self, enabled=bool):
         self.enabled = enabled
 
     def set_idle_time_limit(self, idle_time_limit):
-        """Set the idle time limit for comparing mouse positions"""
+        """Set the time without input after which the timer is paused"""
         self.idle_time_limit = idle_time_limit
+        self.wake_event.set()  # the deadline moved
 
     def get_idle_time_limit(self):
         return self.idle_time_limit
@@ -91,4 +138,3 @@ class MouseTracker:
     
     def is_enabled(self):
         return self.enabled
-
@@ -3,6 +3,12 @@ from .logic.time_tracker import TimeTracker
 from .logic.file_handler import FileHandler
 from .logic.user_trackers import MouseTracker
 from .logic.project_handler import ProjectHandler
+from .logic.session_watcher import SessionWatcher
+from .logic.tracking_engine import TrackingEngine
+from .logic.resource_sampler import ResourceSampler
+from .logic.focus_tracker import FocusTracker
+from .logic.usage_recorder import UsageRecorder
+from .logic.checkpointer import Checkpointer
 
 class LogicRoot():
     def __init__(self, parent):
@@ -13,8 +19,23 @@ class LogicRoot():
         self.time_tracker = TimeTracker(self.parent, self)
         self.app_tracker = AppTracker(self.parent, self)
         self.mouse_tracker = MouseTracker(self.parent, self)
+        self.resource_sampler = ResourceSampler(self.parent, self)
+        self.focus_tracker = FocusTracker(self.parent, self)
+        self.usage_recorder = UsageRecorder(self.parent, self)
+        self.usage_recorder.start()
+        self.checkpointer = Checkpointer(self.parent, self)
+        self.tracking_engine = TrackingEngine(self.parent, self)
+        self.session_watcher = SessionWatcher(self.parent, self)
+        self.session_watcher.start()
     
     def close(self):
         self.time_tracker.stop()
+        self.checkpointer.stop()
         self.app_tracker.stop()
         self.mouse_tracker.stop()
+        self.resource_sampler.stop()
+        self.focus_tracker.stop()
+        self.usage_recorder.stop()
+        self.tracking_engine.stop()
+        self.session_watcher.stop()
+        self.file_handler.close()
@@ -0,0 +1,210 @@
+import tkinter as tk
+from core.utils.tk_utils import messagebox
+from core.utils.time_utils import format_time
+from core.screens.create_session_window import validate_name
+
+import logging
+logger = logging.getLogger(__name__)
+
+REFRESH_MS = 1000
+
+
+class BackgroundSessionsWindow(tk.Frame):
+    """Apps tracked by the tracking engine, each in a session of its own, while the
+    rest of the app is used as usual"""
+    def __init__(self, parent, controller, logic_controller):
+        tk.Frame.__init__(self, parent)
+        self.controller = controller
+        self.logic = logic_controller
+        self.listed_sessions = []
+        self.refresh_job = None
+
+        # Title label
+        title_label = tk.Label(self, text="Background Sessions", font=("Arial", 14, "bold"))
+        title_label.pack(side="top", fill="x", pady=10)
+
+        subtitle = tk.Label(
+            self,
+            text="Each app is tracked while it runs, until its session is saved or discarded.",
+            font=("Arial", 11)
+        )
+        subtitle.pack(side="top", pady=(0, 10))
+
+        # Tracked sessions
+        list_frame = tk.Frame(self)
+        list_frame.pack(fill="both", expand=True, padx=20, pady=5)
+
+        self.session_listbox = tk.Listbox(list_frame, selectmode=tk.SINGLE)
+        self.session_listbox.pack(side="left", fill="both", expand=True)
+
+        scrollbar = tk.Scrollbar(list_frame, orient="vertical", command=self.session_listbox.yview)
+        scrollbar.pack(side="right", fill="y")
+        self.session_listbox.config(yscrollcommand=scrollbar.set)
+
+        session_button_frame = tk.Frame(self)
+        session_button_frame.pack(fill="x", padx=20, pady=5)
+
+        pause_button = tk.Button(session_button_frame, text="Pause/Resume",
+                                 command=self.toggle_pause, width=15)
+        pause_button.pack(side="left", padx=5)
+
+        save_button = tk.Button(session_button_frame, text="Save Session",
+                                command=self.save_session, width=15, bg="#0985d9")
+        save_button.pack(side="left", padx=5)
+
+        discard_button = tk.Button(session_button_frame, text="Discard Session",
+                                   command=self.discard_session, width=15)
+        discard_button.pack(side="left", padx=5)
+
+        # New session: app, name and project
+        add_frame = tk.Frame(self, bd=2, relief="groove", padx=10, pady=10)
+        add_frame.pack(fill="x", padx=20, pady=10)
+
+        app_label = tk.Label(add_frame, text="App:")
+        app_label.grid(row=0, column=0, sticky="w")
+        self.app_var = tk.StringVar()
+        self.app_dropdown = tk.OptionMenu(add_frame, self.app_var, "")
+        self.app_dropdown.grid(row=0, column=1, sticky="ew", padx=5)
+        refresh_button = tk.Button(add_frame, text="Refresh List", command=self.load_apps, width=12)
+        refresh_button.grid(row=0, column=2, padx=5)
+
+        name_label = tk.Label(add_frame, text="Session Name:")
+        name_label.grid(row=1, column=0, sticky="w")
+        vcmd = (self.register(validate_name), '%P')
+        self.session_name = tk.StringVar()
+        session_name_input = tk.Entry(add_frame, textvariable=self.session_name,
+                                      validate="key", validatecommand=vcmd,
+                                      borderwidth=3, relief="groove")
+        session_name_input.grid(row=1, column=1, sticky="ew", padx=5, pady=5)
+        session_name_input.bind('<Return>', lambda event: self.add_session())
+
+        project_label = tk.Label(add_frame, text="Project:")
+        project_label.grid(row=2, column=0, sticky="w")
+        self.project_var = tk.StringVar()
+        self.project_dropdown = tk.OptionMenu(add_frame, self.project_var, "")
+        self.project_dropdown.grid(row=2, column=1, sticky="ew", padx=5)
+
+        add_button = tk.Button(add_frame, text="Track in Background",
+                               command=self.add_session, width=18)
+        add_button.grid(row=1, column=2, rowspan=2, padx=5)
+        add_frame.columnconfigure(1, weight=1)
+
+        self.load_apps()
+        self.load_projects()
+
+        back_button = tk.Button(self, text="Main Menu",
+                                command=lambda: (self.controller.reset_frames(),
+                                                 self.controller.show_frame("MainWindow")))
+        back_button.pack(pady=10, side="bottom")
+
+    def load_apps(self):
+        """Load the running apps into the dropdown"""
+        menu = self.app_dropdown['menu']
+        menu.delete(0, 'end')
+        for app_name in self.logic.app_tracker.get_app_names():
+            menu.add_command(label=app_name, command=lambda a=app_name: self.app_var.set(a))
+
+    def load_projects(self):
+        """Load available projects into the dropdown"""
+        menu = self.project_dropdown['menu']
+        menu.delete(0, 'end')
+        for project in ["No Project"] + self.logic.project_handler.get_projects():
+            menu.add_command(label=project, command=lambda p=project: self.project_var.set(p))
+        self.project_var.set("No Project")
+
+    def _status(self, session):
+        if session.is_finished():
+            return "Finished"
+        if session.is_paused():
+            return "Paused"
+        if session.is_running():
+            return "Tracking"
+        return "Waiting for app"
+
+    def refresh(self):
+        """Update the listed sessions, once a second while the window is shown"""
+        if self.refresh_job is not None:
+            self.after_cancel(self.refresh_job)
+            self.refresh_job = None
+        if self.controller.frames.get("BackgroundSessionsWindow") is not self:
+            return  # replaced by reset_frames()
+        if self.controller.history[self.controller.history_index] != "BackgroundSessionsWindow":
+            return
+
+        selection = self.session_listbox.curselection()
+        self.listed_sessions = self.logic.tracking_engine.get_sessions()
+        self.session_listbox.delete(0, tk.END)
+        for session in self.listed_sessions:
+            project = f" [{session.project_name}]" if session.project_name else ""
+            self.session_listbox.insert(
+                tk.END,
+                f"{session.session_name}{project} - {session.app_name} - {self._status(session)}"
+                f" - {format_time(int(session.get_total_time()))}"
+            )
+        if selection and selection[0] < len(self.listed_sessions):
+            self.session_listbox.selection_set(selection[0])
+        self.refresh_job = self.after(REFRESH_MS, self.refresh)
+
+    def _selected_session(self):
+        selection = self.session_listbox.curselection()
+        if not selection or selection[0] >= len(self.listed_sessions):
+            messagebox.showerror("Error", "Please select a session.")
+            return None
+        return self.listed_sessions[selection[0]]
+
+    def add_session(self):
+        """Track the chosen app in a new or continued session"""
+        app_name = self.app_var.get()
+        session_name = self.session_name.get().strip()
+        project_name = self.project_var.get()
+        project_name = None if project_name == "No Project" else project_name
+
+        if not app_name:
+            messagebox.showerror("Error", "Please select an application.")
+            return
+        if not session_name:
+            messagebox.showerror("Error", "Please enter a session name.")
+            return
+
+        try:
+            self.logic.tracking_engine.add_session(app_name, session_name, project_name)
+        except ValueError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        logger.info(f"Tracking {app_name} in background session {session_name}")
+        self.session_name.set("")
+        self.refresh()
+
+    def toggle_pause(self):
+        session = self._selected_session()
+        if session is None:
+            return
+        if session.is_paused():
+            session.resume()
+        else:
+            session.pause()
+        self.refresh()
+
+    def save_session(self):
+        session = self._selected_session()
+        if session is None:
+            return
+        if not session.is_started():
+            messagebox.showerror("Error", f"{session.app_name} has not been tracked yet, nothing to save.")
+            return
+        try:
+            self.logic.tracking_engine.save_session(session)
+        except OSError as e:
+            logger.error(f"Could not save session {session.session_name}: {e}")
+            messagebox.showerror("Error", f"Could not save session {session.session_name}:\n{e}")
+            return
+        messagebox.showinfo("AppUsageGUI", f"Saved session {session.session_name}.")
+        self.refresh()
+
+    def discard_session(self):
+        session = self._selected_session()
+        if session is None:
+            return
+        if messagebox.askyesno("AppUsageGUI", f"Stop tracking {session.session_name} without saving?"):
+            self.logic.tracking_engine.discard_session(session)
+            self.refresh()
@@ -53,6 +53,14 @@ class MainWindow(tk.Frame):
         )
         btn_rules.grid(row=1, column=1, padx=10, pady=10)
 
+        # Row 3: Apps tracked in the background
+        btn_background = tk.Button(
+            button_frame, text="Background Sessions",
+            command=lambda: self.controller.show_frame("BackgroundSessionsWindow"),
+            width=20, height=2
+        )
+        btn_background.grid(row=2, column=0, columnspan=2, padx=10, pady=10)
+
         # Exit Button at Bottom
         exit_button = tk.Button(
             self, text="Exit", command=self.controller.on_close,
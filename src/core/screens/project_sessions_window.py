@@ -1,9 +1,9 @@
 import tkinter as tk
 from core.utils.tk_utils import messagebox
 
-from core.utils.file_utils import get_project_sessions
 from core.utils.file_utils import get_projects_directory
 from core.utils.time_utils import format_time
+from core.logic.session_watcher import RESCAN
 import logging
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,7 @@ class ProjectSessionsWindow(tk.Frame):
         tk.Frame.__init__(self, parent)
         self.controller = controller
         self.logic = logic_controller
+        self.listed_sessions = []
 
         # Title label with current project
         self.title_label = tk.Label(self, text="Sessions", font=("Arial", 14, "bold"))
@@ -67,14 +68,40 @@ class ProjectSessionsWindow(tk.Frame):
                               command=lambda: self.controller.show_frame("ProjectsWindow"))
         back_button.pack(pady=5, side='bottom')
 
-    def load_sessions(self):
-        """Load session data into the listbox and handle broken sessions"""
+    def _display_text(self, row):
+        """Listbox text of a session catalog row"""
+        session_name = row['name']
+        app_name = row['app_name']
+        created_date = row['created_date']
+
+        # Format the time spent
+        formatted_time = format_time(int(row['time_spent']))
+
+        # Format created date
+        if created_date != 'Unknown':
+            try:
+                from datetime import datetime
+                dt = datetime.fromisoformat(created_date)
+                formatted_date = dt.strftime("%Y-%m-%d %H:%M")
+            except Exception:
+                formatted_date = created_date
+        else:
+            formatted_date = "Unknown date"
+
+        return f"{session_name}: {app_name}, {formatted_time} ({formatted_date})"
+
+    def _render_sessions(self):
+        """Fill the listbox from the session catalog. Returns False if there was
+        nothing to load"""
         # Clear the listbox
         self.session_listbox.delete(0, tk.END)
-        
+
+        # Session name of each listbox line
+        self.listed_sessions = []
+
         # Get selected project from controller
         selected_project = self.logic.project_handler.get_selected_project()
-        
+
         if selected_project:
             self.title_label.config(text=f'"{selected_project}" sessions')
             self.current_project_label.config(text=f"Project: {selected_project}")
@@ -82,44 +109,56 @@ class ProjectSessionsWindow(tk.Frame):
             self.title_label.config(text="Sessions")
             self.current_project_label.config(text="No project selected")
             self.session_listbox.insert(tk.END, "No project selected. Please select a project first.")
-            return
+            return False
+
+        # Get session summaries for selected project from the session catalog
+        sessions = [row for row in self.logic.file_handler.get_session_catalog()
+                    if row['project'] == selected_project]
 
-        # Get sessions for selected project
-        sessions = get_project_sessions(selected_project)
-        
         if not sessions:
             self.session_listbox.insert(tk.END, f"No sessions found in project '{selected_project}'.")
+            return False
+
+        for row in sessions:
+            # Insert into the Listbox
+            self.listed_sessions.append(row['name'])
+            self.session_listbox.insert(tk.END, self._display_text(row))
+        return True
+
+    def refresh_sessions(self, updated):
+        """Update the listbox in place for the (project, name) keys of sessions
+        changed on disk"""
+        if RESCAN in updated or not self.listed_sessions:
+            self._render_sessions()
+            return
+
+        selected_project = self.logic.project_handler.get_selected_project()
+        for project_name, session_name in updated:
+            if project_name != selected_project:
+                continue
+            row = self.logic.file_handler.get_catalog_row(session_name, project_name)
+            if session_name in self.listed_sessions:
+                index = self.listed_sessions.index(session_name)
+                selected = index in self.session_listbox.curselection()
+                self.session_listbox.delete(index)
+                if row is None:
+                    del self.listed_sessions[index]
+                    continue
+                self.session_listbox.insert(index, self._display_text(row))
+                if selected:
+                    self.session_listbox.selection_set(index)
+            elif row is not None:
+                self.listed_sessions.append(session_name)
+                self.session_listbox.insert(tk.END, self._display_text(row))
+
+        if not self.listed_sessions:
+            self._render_sessions()
+
+    def load_sessions(self):
+        """Load session data into the listbox and handle broken sessions"""
+        if not self._render_sessions():
             return
 
-        for session in sessions:
-            session_name = session.split(".")[0]
-            # Load data for the current session
-            self.logic.file_handler.load_session_data(session_name, selected_project)
-            session_data = self.logic.file_handler.get_data()
-            
-            if session_data is not None:
-                app_name = session_data.get('app_name', 'Unknown')
-                time_spent = session_data.get('time_spent', 0)
-                created_date = session_data.get('created_date', 'Unknown')
-                
-                # Format the time spent
-                formatted_time = format_time(int(time_spent))
-                
-                # Format created date
-                if created_date != 'Unknown':
-                    try:
-                        from datetime import datetime
-                        dt = datetime.fromisoformat(created_date)
-                        formatted_date = dt.strftime("%Y-%m-%d %H:%M")
-                    except Exception:
-                        formatted_date = created_date
-                else:
-                    formatted_date = "Unknown date"
-                
-                # Insert into the Listbox
-                display_text = f"{session_name}: {app_name}, {formatted_time} ({formatted_date})"
-                self.session_listbox.insert(tk.END, display_text)
-        
         # Check for corrupt sessions
         corrupt_sessions = self.logic.file_handler.get_corrupt_sessions()
         if len(corrupt_sessions) > 0:
@@ -178,7 +217,6 @@ class ProjectSessionsWindow(tk.Frame):
         self.logic.app_tracker.set_selected_app(selected_app_name)
         self.logic.time_tracker.reset(add_time=self.logic.file_handler.get_data()['time_spent'])
         self.logic.time_tracker.start()
-        self.logic.time_tracker.clock()
 
         # Start the update thread for the tracker window
         self.controller.frames["TrackerWindow"].start_update_thread()
@@ -65,32 +65,55 @@ class ProjectsWindow(tk.Frame):
         self.project_listbox.bind("<Return>", lambda e: self.view_sessions())
 
 
+    def _project_lines(self):
+        """Listbox text of every project"""
+        lines = []
+        for project, project_info in self.logic.project_handler.get_all_project_info().items():
+            session_count = project_info.get('session_count', 0)
+
+            # Get total time for the project
+            if 'time_spent' in project_info:
+                total_time = project_info['time_spent']
+            else:
+                total_time = self.logic.project_handler.get_project_total_time(project)
+            formatted_time = format_time(total_time)
+
+            # Format display text
+            lines.append(f"{project} ({session_count} sessions, Total session time: {formatted_time})")
+        return lines
+
     def load_projects(self):
         """Load projects into the listbox"""
+        self.project_listbox.config(state=tk.NORMAL)
         self.project_listbox.delete(0, tk.END)
-        
+
         # Load all projects
-        projects = self.logic.project_handler.get_projects()
-        
-        if not projects:
+        lines = self._project_lines()
+
+        if not lines:
             self.project_listbox.insert(tk.END, "No projects found. Create a new project to get started.")
             self.project_listbox.config(state=tk.DISABLED)
         else:
-            self.project_listbox.config(state=tk.NORMAL)
-            for project in projects:
-                # Get project info
-                project_info = self.logic.project_handler.get_project_info(project)
-                session_count = project_info.get('session_count', 0) if project_info else 0
-                
-                # Get total time for the project
-                total_time = self.logic.project_handler.get_project_total_time(project)
-                formatted_time = format_time(total_time)
-                
-                # Format display text
-                display_text = f"{project} ({session_count} sessions, Total session time: {formatted_time})"
-                
+            for display_text in lines:
                 self.project_listbox.insert(tk.END, display_text)
 
+    def refresh_projects(self):
+        """Update the listbox in place after projects or their sessions changed on
+        disk, only rewriting the lines that differ"""
+        lines = self._project_lines()
+        current = self.project_listbox.get(0, tk.END)
+        if str(self.project_listbox.cget("state")) == tk.DISABLED or len(lines) != len(current):
+            self.load_projects()
+            return
+
+        selection = self.project_listbox.curselection()
+        for index, (old_text, new_text) in enumerate(zip(current, lines)):
+            if old_text != new_text:
+                self.project_listbox.delete(index)
+                self.project_listbox.insert(index, new_text)
+                if index in selection:
+                    self.project_listbox.selection_set(index)
+
     def get_selected_project(self):
         """Get the selected project name from the listbox"""
         selected_index = self.project_listbox.curselection()
@@ -50,6 +50,8 @@ class SaveWindow(tk.Frame):
         # Stop the time tracker before saving to ensure we have proper stop times
         if self.logic.time_tracker.is_running():
             self.logic.time_tracker.stop()
+        self.logic.resource_sampler.stop()
+        self.logic.focus_tracker.stop()
 
         if self.logic.file_handler.get_continuing_session():
             # Continuing an existing session - update it
@@ -70,11 +72,16 @@ class SaveWindow(tk.Frame):
                     'time_spent': session_time,
                     'session_version': sv,
                     'config': self.config,
-                    'time_captures': captures # {'starts': [], 'stops': [], 'pauses': [{start: 0, how_long: 0}]}
+                    'time_captures': captures, # {'starts': [], 'stops': [], 'pauses': [{start: 0, how_long: 0}]}
+                    'resource_usage': self.logic.resource_sampler.get_resource_usage()
                     }
             logger.info("save_window.py data save: " + f"{data}")
 
-            self.logic.file_handler.save_session_data(data)
+            # the captures of this run are already in the capture journal
+            self.logic.file_handler.save_session_incremental(
+                data, self.logic.resource_sampler.get_new_resource_buckets()
+            )
+            self.logic.checkpointer.stop(clear=True)
 
             # show to session total window
             self.controller.frames['SessionTotalWindow'].total_session_time_thread.start()
@@ -95,11 +102,13 @@ class SaveWindow(tk.Frame):
                     'time_spent': session_time,
                     'session_version': __version__.split('.')[0] + '.' + __version__.split('.')[1],
                     'config': self.config,
-                    'time_captures': captures # {'starts': [], 'stops': [], 'pauses': [{start: 0, how_long: 0}]}
+                    'time_captures': captures, # {'starts': [], 'stops': [], 'pauses': [{start: 0, how_long: 0}]}
+                    'resource_usage': self.logic.resource_sampler.get_resource_usage()
                     }
             logger.info(f"Session data: {data}")
 
             self.logic.file_handler.save_session_data(data)
+            self.logic.checkpointer.stop(clear=True)
 
             # Load the saved session data and show session total window
             session_name = self.logic.file_handler.get_file_name()
@@ -114,6 +123,8 @@ class SaveWindow(tk.Frame):
         ans = messagebox.askyesno("AppUsageGUI", "Are you sure you don't want to save?")
         if ans:
             time.sleep(0.3)
+            self.logic.file_handler.discard_journal()
+            self.logic.checkpointer.stop(clear=True)
             self.logic.time_tracker.reset()
             self.logic.app_tracker.reset()
             self.controller.reset_frames()
@@ -3,11 +3,30 @@ import queue
 import threading
 
 from core.utils.time_utils import format_time, unix_to_datetime
-from core.utils.file_utils import calc_runtime
+from core.utils.file_utils import PAUSE_IDLE, calc_runtime
+from core.logic.resource_sampler import summarize_resource_usage
 
 import logging
 logger = logging.getLogger(__name__)
 
+def format_bytes(size):
+    """Formats a size in bytes with a binary unit"""
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TiB"
+
+def format_resource_usage(usage):
+    """Formats the figures of summarize_resource_usage()"""
+    if usage is None:
+        return "N/A"
+    return (
+        f"CPU {usage['cpu_avg']:.1f}% avg, {usage['cpu_peak']:.1f}% peak; "
+        f"Memory {format_bytes(usage['rss_avg'])} avg, {format_bytes(usage['rss_peak'])} peak; "
+        f"Disk {format_bytes(usage['read_bytes'])} read, {format_bytes(usage['write_bytes'])} written"
+    )
+
 class SessionTotalWindow(tk.Frame):
     def __init__(self, parent, controller, logic_controller):
         super().__init__(parent)
@@ -27,6 +46,9 @@ class SessionTotalWindow(tk.Frame):
         self.stop_readout = "Error"
         self.last_run_readout = "Error"
         self.num_starts_readout = "Error"
+        self.resources_readout = "N/A"
+        self.focus_readout = "N/A"
+        self.idle_readout = "N/A"
 
         # ===== Title Section =====
         title_frame = tk.Frame(self, pady=10)
@@ -82,6 +104,16 @@ class SessionTotalWindow(tk.Frame):
         self.num_starts_label = tk.Label(card, text="Number of Runs: " + self.num_starts_readout, anchor="w")
         self.num_starts_label.pack(fill="x", pady=4)
 
+        self.focus_label = tk.Label(card, text="Focused Time: " + self.focus_readout, anchor="w")
+        self.focus_label.pack(fill="x", pady=4)
+
+        self.idle_label = tk.Label(card, text="Idle Time: " + self.idle_readout, anchor="w")
+        self.idle_label.pack(fill="x", pady=4)
+
+        self.resources_label = tk.Label(card, text="Resource Usage: " + self.resources_readout, anchor="w",
+                                        justify="left", wraplength=500)
+        self.resources_label.pack(fill="x", pady=4)
+
         # ===== Back Button =====
         back_button = tk.Button(
             self,
@@ -133,6 +165,14 @@ class SessionTotalWindow(tk.Frame):
             self.last_run_label.config(text="Last Run Length: " + last_run_text)
 
             self.num_starts_label.config(text="Number of Runs: " + (item['num_starts'] if item['num_starts'] != "N/A" else "N/A"))
+
+            focus_text = format_time(int(item['focus_time'])) if item['focus_time'] is not None else "N/A"
+            self.focus_label.config(text="Focused Time: " + focus_text)
+
+            idle_text = format_time(int(item['idle_time'])) if item['idle_time'] is not None else "N/A"
+            self.idle_label.config(text="Idle Time: " + idle_text)
+
+            self.resources_label.config(text="Resource Usage: " + format_resource_usage(item['resource_usage']))
         except queue.Empty:
             pass
         except Exception:
@@ -152,7 +192,10 @@ class SessionTotalWindow(tk.Frame):
                 'first_run': "N/A",
                 'last_run': "N/A",
                 'last_run_length': "N/A",
-                'num_starts': "N/A"
+                'num_starts': "N/A",
+                'resource_usage': None,
+                'focus_time': None,
+                'idle_time': None
             }
             try:
                 data.update({
@@ -172,8 +215,13 @@ class SessionTotalWindow(tk.Frame):
                         'first_run': time_captures['starts'][0] if time_captures['starts'] else "N/A",
                         'last_run': time_captures['stops'][-1] if time_captures['stops'] else "N/A",
                         'last_run_length': calc_runtime(self.logic.file_handler.get_data(), -1),
-                        'num_starts': str(len(time_captures['starts']))
+                        'num_starts': str(len(time_captures['starts'])),
+                        'resource_usage': summarize_resource_usage(self.logic.file_handler.get_data().get('resource_usage'))
                     })
+                    if 'focus' in time_captures:
+                        data['focus_time'] = sum(focus['how_long'] for focus in time_captures['focus'])
+                    data['idle_time'] = sum(pause['how_long'] for pause in time_captures['pauses']
+                                            if pause.get('reason') == PAUSE_IDLE)
                 elif 'session_version' in self.logic.file_handler.get_data():
                     time_captures = self.logic.file_handler.get_data()['time_captures']
                     data.update({
@@ -1,7 +1,9 @@
+import bisect
 import tkinter as tk
 from core.utils.tk_utils import messagebox, center_relative_to_parent
-from core.utils.file_utils import get_sessions, get_sessions_directory, get_session_project, get_projects
+from core.utils.file_utils import get_sessions_directory, get_session_project, get_projects
 from core.utils.time_utils import format_time
+from core.logic.session_watcher import RESCAN
 
 import logging
 logger = logging.getLogger(__name__)
@@ -12,6 +14,7 @@ class SessionsWindow(tk.Frame):
         tk.Frame.__init__(self, parent)
         self.controller = controller
         self.logic = logic_controller
+        self.listed_sessions = []
 
         # Title label
         title_label = tk.Label(self, text="Session Management", font=("Arial", 14, "bold"))
@@ -111,66 +114,55 @@ class SessionsWindow(tk.Frame):
         self.project_filter_var.set(selected_filter)
         self.load_sessions()
 
-    def load_sessions(self):
-        """Load session data into the listbox and
-        handle broken sessions"""
-
-        # List for all unsorted sessions
-        unsorted_sessions = []
+    def _matches_filter(self, project_name):
+        """Check if sessions of a project are shown with the selected filter"""
+        selected_filter = self.project_filter_var.get()
+        if selected_filter == "All":
+            # Show all sessions
+            return True
+        if selected_filter == "No Project":
+            # Only show sessions without projects
+            return project_name is None
+        # Only show sessions from the selected project
+        return project_name == selected_filter
+
+    def _display_text(self, row):
+        """Listbox text of a session catalog row"""
+        session_name = row['name']
+        project_name = row['project']
+        app_name = row['app_name']
+        # Format the time spent
+        formatted_time = format_time(int(row['time_spent']))
+
+        # Create display text with project info
+        if project_name:
+            return f"{session_name} [{project_name}]: {app_name}, {formatted_time} on record"
+        return f"{session_name} [No Project]: {app_name}, {formatted_time} on record"
 
+    def _render_sessions(self):
+        """Fill the listbox from the session catalog"""
         # Clear the listbox first
         self.session_listbox.delete(0, tk.END)
 
-        # Get the selected filter
-        selected_filter = self.project_filter_var.get()
-
-        sessions = get_sessions()
-        for session in sessions:
-            session_name = session.split(".")[0]
-            # Determine which project this session belongs to
-            project_name = get_session_project(session)
+        # (sort key, session key) of each listbox line, newest first
+        self.listed_sessions = []
 
-            # Apply filter
-            if selected_filter == "All":
-                # Show all sessions
-                pass
-            elif selected_filter == "No Project":
-                # Only show sessions without projects
-                if project_name is not None:
-                    continue
-            else:
-                # Only show sessions from the selected project
-                if project_name != selected_filter:
-                    continue
-
-            # Load data for the current session
-            self.logic.file_handler.load_session_data(session_name, project_name)
-            session_data = self.logic.file_handler.get_data()
-            if session_data is not None and session_data != {}:
-                app_name = session_data['app_name']
-                time_spent = session_data['time_spent']
-                if ('time_captures' in session_data and 'stops' in session_data['time_captures'] and len(session_data['time_captures']['stops']) > 0):
-                    last_stopped = session_data['time_captures']['stops'][-1]
-                else:
-                    last_stopped = 0
-                # Format the time spent
-                formatted_time = format_time(int(time_spent))
-
-                # Create display text with project info
-                if project_name:
-                    display_text = f"{session_name} [{project_name}]: {app_name}, {formatted_time} on record"
-                else:
-                    display_text = f"{session_name} [No Project]: {app_name}, {formatted_time} on record"
-
-                # Insert into the Listbox
-                unsorted_sessions.append((last_stopped, display_text))
+        # Session summaries come from the catalog, which only reads session files when stale
+        rows = {}
+        for row in self.logic.file_handler.get_session_catalog():
+            if self._matches_filter(row['project']):
+                key = (row['project'], row['name'])
+                rows[key] = row
+                self.listed_sessions.append((-row['last_stopped'], key))
 
         # Sort and insert into the Listbox based on last stopped time
-        for _, display_text in sorted(unsorted_sessions, key=lambda x: x[0], reverse=True):
-            self.session_listbox.insert(tk.END, display_text)
+        self.listed_sessions.sort(key=lambda x: x[0])
+        for _, key in self.listed_sessions:
+            self.session_listbox.insert(tk.END, self._display_text(rows[key]))
 
         # Show message if no sessions match the filter
         if self.session_listbox.size() == 0:
+            selected_filter = self.project_filter_var.get()
             if selected_filter == "All":
                 self.session_listbox.insert(tk.END, "No sessions found.")
             elif selected_filter == "No Project":
@@ -178,6 +170,43 @@ class SessionsWindow(tk.Frame):
             else:
                 self.session_listbox.insert(tk.END, f"No sessions found in project '{selected_filter}'.")
 
+    def refresh_sessions(self, updated):
+        """Update the listbox in place for the (project, name) keys of sessions
+        changed on disk, keeping the selection"""
+        if RESCAN in updated or not self.listed_sessions:
+            self._render_sessions()
+            return
+
+        selection = self.session_listbox.curselection()
+        selected = self.listed_sessions[selection[0]][1] if selection else None
+
+        listed_keys = [key for _, key in self.listed_sessions]
+        for key in updated:
+            if key in listed_keys:
+                index = listed_keys.index(key)
+                self.session_listbox.delete(index)
+                del self.listed_sessions[index]
+                del listed_keys[index]
+
+            project_name, session_name = key
+            row = self.logic.file_handler.get_catalog_row(session_name, project_name)
+            if row is not None and self._matches_filter(project_name):
+                entry = (-row['last_stopped'], key)
+                index = bisect.bisect_right(self.listed_sessions, entry[0], key=lambda e: e[0])
+                self.listed_sessions.insert(index, entry)
+                listed_keys.insert(index, key)
+                self.session_listbox.insert(index, self._display_text(row))
+
+        if not self.listed_sessions:
+            self._render_sessions()
+        elif selected in listed_keys:
+            self.session_listbox.selection_set(listed_keys.index(selected))
+
+    def load_sessions(self):
+        """Load session data into the listbox and
+        handle broken sessions"""
+        self._render_sessions()
+
         corrupt_sessions = self.logic.file_handler.get_corrupt_sessions()
         if len(corrupt_sessions) > 0:
             error_string = "The following session(s) failed to load:\n\n"
@@ -231,7 +260,6 @@ class SessionsWindow(tk.Frame):
         self.logic.app_tracker.set_selected_app(app_part)
         self.logic.time_tracker.reset(add_time=self.logic.file_handler.get_data()['time_spent'])
         self.logic.time_tracker.start()
-        self.logic.time_tracker.clock()
 
         # show the TrackerWindow
         self.controller.show_frame('TrackerWindow')
@@ -6,7 +6,9 @@ import tkinter as tk
 from tkinter import ttk
 import os
 from core.utils.tk_utils import messagebox
-from core.utils.file_utils import read_file, write_file, config_file
+from core.utils.file_utils import (
+    read_file, write_file, config_file, VERIFY_EAGER, VERIFY_FIRST_TOUCH, VERIFY_BACKGROUND,
+)
 
 import logging
 logger = logging.getLogger(__name__)
@@ -24,7 +26,7 @@ logger = logging.getLogger(__name__)
 #   key              str   Key used in the persisted config dict.
 #   label            str   Short label shown next to the control.
 #   description      str   Explanatory text rendered below the control.
-#   type             str   "checkbox" | "spinbox" | "section_header"
+#   type             str   "checkbox" | "spinbox" | "choice" | "section_header"
 #   default                Fallback value when no saved config exists.
 #   requires_restart bool  Show a restart notice when this value changes.
 #
@@ -33,6 +35,9 @@ logger = logging.getLogger(__name__)
 #   max  int   Maximum value.
 #   unit str   Unit label shown after the spinbox (e.g. "seconds").
 #
+# Extra fields for "choice":
+#   options  list  (value, label) pairs shown in a drop-down, label is displayed.
+#
 # "section_header" only needs: tab, type, label.
 # ---------------------------------------------------------------------------
 
@@ -78,8 +83,8 @@ SETTINGS_SCHEMA: list[dict] = [
         "key": "mouse_tracker_enabled",
         "label": "Enable mouse idle detection",
         "description": (
-            "Automatically pause time tracking when the mouse has not moved "
-            "for the configured timeout."
+            "Automatically pause time tracking when there has been no mouse or "
+            "keyboard input for the configured timeout."
         ),
         "type": "checkbox",
         "default": True,
@@ -90,7 +95,7 @@ SETTINGS_SCHEMA: list[dict] = [
         "key": "mouse_idle_time_limit",
         "label": "Idle timeout",
         "description": (
-            "How long the mouse must remain still before tracking is paused. Must be between 5 and 3600 seconds."
+            "How long there must be no input before tracking is paused. Must be between 5 and 3600 seconds."
         ),
         "type": "spinbox",
         "default": 90,
@@ -100,6 +105,67 @@ SETTINGS_SCHEMA: list[dict] = [
         "requires_restart": False,
     },
 
+    {
+        "tab": "Tracking",
+        "type": "section_header",
+        "label": "Resource Usage",
+    },
+    {
+        "tab": "Tracking",
+        "key": "resource_sample_interval",
+        "label": "Sampling interval",
+        "description": (
+            "How often the CPU, memory and disk usage of the tracked app is sampled. "
+            "Must be between 1 and 300 seconds."
+        ),
+        "type": "spinbox",
+        "default": 5,
+        "min": 1,
+        "max": 300,
+        "unit": "seconds",
+        "requires_restart": False,
+    },
+
+    {
+        "tab": "Tracking",
+        "type": "section_header",
+        "label": "Crash Recovery",
+    },
+    {
+        "tab": "Tracking",
+        "key": "checkpoint_interval",
+        "label": "Checkpoint interval",
+        "description": (
+            "How often the session being tracked is checkpointed, so it can be "
+            "restored after a crash. Must be between 5 and 600 seconds."
+        ),
+        "type": "spinbox",
+        "default": 30,
+        "min": 5,
+        "max": 600,
+        "unit": "seconds",
+        "requires_restart": False,
+    },
+
+    {
+        "tab": "Tracking",
+        "type": "section_header",
+        "label": "Background Recording",
+    },
+    {
+        "tab": "Tracking",
+        "key": "background_recording",
+        "label": "Record usage of all apps",
+        "description": (
+            "While AppUsageGUI is open, record how long every app runs, and is in "
+            "the foreground on Linux/X11, into one small usage file per day. "
+            "Independent of sessions."
+        ),
+        "type": "checkbox",
+        "default": False,
+        "requires_restart": False,
+    },
+
     # ── Filtering ─────────────────────────────────────────────────────────────
     {
         "tab": "Filtering",
@@ -119,6 +185,59 @@ SETTINGS_SCHEMA: list[dict] = [
         "default": True,
         "requires_restart": True,
     },
+    {
+        "tab": "Filtering",
+        "key": "max_poll_interval",
+        "label": "Maximum scan interval",
+        "description": (
+            "Running processes are scanned quickly while apps start or close, and "
+            "less and less often while nothing changes, down to once per this interval. "
+            "Must be between 1 and 60 seconds."
+        ),
+        "type": "spinbox",
+        "default": 8,
+        "min": 1,
+        "max": 60,
+        "unit": "seconds",
+        "requires_restart": False,
+    },
+
+    # ── Sessions ──────────────────────────────────────────────────────────────
+    {
+        "tab": "Sessions",
+        "type": "section_header",
+        "label": "Integrity Checks",
+    },
+    {
+        "tab": "Sessions",
+        "key": "session_verification",
+        "label": "Verify session checksums",
+        "description": (
+            "Every load checks each session file every time it is opened. "
+            "First load checks a file once and skips the check while it is unchanged. "
+            "Background also checks all session files after startup, so later loads are faster."
+        ),
+        "type": "choice",
+        "options": [
+            (VERIFY_EAGER, "Every load"),
+            (VERIFY_FIRST_TOUCH, "First load"),
+            (VERIFY_BACKGROUND, "Background"),
+        ],
+        "default": VERIFY_FIRST_TOUCH,
+        "requires_restart": False,
+    },
+    {
+        "tab": "Sessions",
+        "key": "persist_verified_sessions",
+        "label": "Remember verified sessions between runs",
+        "description": (
+            "Unchanged session files that were already checked are not checked again "
+            "after the application restarts."
+        ),
+        "type": "checkbox",
+        "default": False,
+        "requires_restart": False,
+    },
 ]
 
 
@@ -267,6 +386,8 @@ class SettingsWindow(tk.Frame):
             self._add_checkbox(parent, schema)
         elif stype == "spinbox":
             self._add_spinbox(parent, schema)
+        elif stype == "choice":
+            self._add_choice(parent, schema)
         else:
             logger.warning("Unknown setting type %r — skipped.", stype)
 
@@ -356,6 +477,43 @@ class SettingsWindow(tk.Frame):
                 anchor="w",
             ).pack(anchor="w", pady=(2, 0))
 
+    def _add_choice(self, parent: tk.Frame, schema: dict):
+        """Label + read-only drop-down on one line, with a description below."""
+        key = schema["key"]
+        labels = dict(schema["options"])
+        value = self._settings.get(key, schema["default"])
+        var = tk.StringVar(value=labels.get(value, labels[schema["default"]]))
+        self._vars[key] = var
+
+        restart_note = "  ⟳" if schema.get("requires_restart") else ""
+
+        wrapper = tk.Frame(parent)
+        wrapper.pack(fill="x", padx=24, pady=(10, 0))
+
+        ctrl_row = tk.Frame(wrapper)
+        ctrl_row.pack(fill="x")
+
+        tk.Label(ctrl_row, text=schema["label"] + restart_note).pack(side="left")
+
+        ttk.Combobox(
+            ctrl_row,
+            textvariable=var,
+            values=list(labels.values()),
+            state="readonly",
+            width=14,
+        ).pack(side="left", padx=(8, 4))
+
+        if schema.get("description"):
+            tk.Label(
+                wrapper,
+                text=schema["description"],
+                font=("TkDefaultFont", 9),
+                fg="gray",
+                wraplength=460,
+                justify="left",
+                anchor="w",
+            ).pack(anchor="w", pady=(2, 0))
+
     # -- Footer --------------------------------------------------------------
 
     def _build_footer(self):
@@ -431,6 +589,9 @@ class SettingsWindow(tk.Frame):
                         new_val = min(hi, new_val)
                 except (ValueError, tk.TclError):
                     new_val = schema["default"]
+            elif stype == "choice":
+                values = {label: value for value, label in schema["options"]}
+                new_val = values.get(var.get(), schema["default"])
             else:
                 continue
 
@@ -471,3 +632,13 @@ class SettingsWindow(tk.Frame):
         mouse = self.logic.mouse_tracker
         mouse.set_enabled(self._settings["mouse_tracker_enabled"])
         mouse.set_idle_time_limit(self._settings["mouse_idle_time_limit"])
+
+        self.logic.usage_recorder.set_enabled(self._settings["background_recording"])
+        self.logic.resource_sampler.set_interval(self._settings["resource_sample_interval"])
+        self.logic.checkpointer.set_interval(self._settings["checkpoint_interval"])
+        self.logic.app_tracker.set_max_poll_interval(self._settings["max_poll_interval"])
+
+        self.logic.file_handler.set_verification_mode(
+            self._settings["session_verification"],
+            self._settings["persist_verified_sessions"],
+        )
@@ -8,7 +8,7 @@ else:
     import fcntl
 
 from core.utils.tk_utils import center, messagebox
-from core.utils.file_utils import sessions_exist, user_dir_exists, lock_file
+from core.utils.file_utils import sessions_exist, user_dir_exists, lock_file, migrate_sessions
 from _path import resource_path
 
 import logging
@@ -29,6 +29,29 @@ def is_running(lock_path=lock_file()):
         return True  # Lock failed, already running
 
 
+def recover_session(win, checkpoint):
+    """Offer to restore the session of a checkpoint left behind by a crash"""
+    from core.utils.time_utils import format_time
+
+    session = checkpoint["file_name"]
+    if checkpoint["project_name"]:
+        session += f" (project {checkpoint['project_name']})"
+    restore = messagebox.askyesno(
+        "Recover Session",
+        f"AppUsageGUI closed before session {session} was saved.\n\n"
+        f"Restore the {format_time(checkpoint['time_spent'])} tracked for {checkpoint['app_name']}?",
+    )
+    checkpointer = win.logic.checkpointer
+    if not restore:
+        checkpointer.discard(checkpoint)
+        return
+    try:
+        checkpointer.restore(checkpoint)
+    except Exception as e:
+        logger.error(f"Could not restore session from checkpoint: {e}")
+        messagebox.showerror("Recover Session", f"The session could not be restored:\n\n{e}")
+
+
 def splash_screen(root):
     """Display a splash screen while the application loads."""
     splash_window = tk.Toplevel(root)
@@ -91,15 +114,22 @@ def splash_screen(root):
     def load_app():
         try:
             update_progress(10)
-            sessions_exist(p=True)
-
-            update_progress(30)
             if is_running():
                 messagebox.showerror("Error", "The application is already running.\n\nExiting.")
                 logger.error("The application is already running. Exiting.")
                 splash_window.destroy()
                 sys.exit(0)
 
+            update_progress(30)
+            if sessions_exist(p=True):
+                # Upgrade old session files so later loads are a single read and decode.
+                # Only once the lock is held, the running instance may be using them
+                migrate_sessions()
+
+            # A checkpoint left behind means the last session was never saved
+            from core.logic.checkpointer import read_checkpoint
+            checkpoint = read_checkpoint()
+
             update_progress(50)
             from core.utils.app_utils import new_updates
             if new_updates():
@@ -109,6 +139,8 @@ def splash_screen(root):
             from core.gui_root import GUIRoot
             update_progress(80)
             win = GUIRoot(root)
+            if checkpoint is not None:
+                recover_session(win, checkpoint)
 
             update_progress(100)
             root.update()
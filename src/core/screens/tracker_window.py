@@ -54,6 +54,7 @@ class TrackerWindow(tk.Frame):
         self.rec_time = 0
         self.stop_event = threading.Event()
         self.update_thread = None
+        self.exit_waiter = None
 
         # images
         self.pause_photo = load_white_icon(os.path.join(resource_path("core"), "resources", "button-resources", "pause_button.png"))
@@ -128,14 +129,13 @@ class TrackerWindow(tk.Frame):
             self.app = self.logic.app_tracker.get_selected_app()
             self.session_name = self.logic.file_handler.get_file_name()
             self.project_name = self.logic.file_handler.get_project_name()
-            app_names = self.logic.app_tracker.get_app_names()
 
             if self._should_start_tracking():
                 self._start_tracking()
             elif self.logic.file_handler.get_continuing_tracker():
                 self.logic.mouse_tracker.start()
 
-            if self._should_stop_tracking(app_names):
+            if self._should_stop_tracking():
                 self._stop_tracking()
                 break
 
@@ -144,8 +144,15 @@ class TrackerWindow(tk.Frame):
             else:
                 self.update_queue.put((self.TIME_UPDATE, "Looking for application..."))
 
-            self.stop_event.wait(timeout=0.1)
+            if self.exit_waiter is not None:
+                # Returns as soon as the app exits
+                self.exit_waiter.wait(timeout=0.1)
+            else:
+                self.stop_event.wait(timeout=0.1)
 
+        self._close_exit_waiter()
+        self.logic.resource_sampler.stop()
+        self.logic.focus_tracker.stop()
         if round(self.logic.time_tracker.get_elapsed_time()) > 0:
             self.controller.show_frame("SaveWindow")
         else:
@@ -161,22 +168,33 @@ class TrackerWindow(tk.Frame):
     def _should_start_tracking(self):
         return self.app and not self.logic.time_tracker.is_running()
 
-    def _should_stop_tracking(self, app_names):
-        return (
-            self.logic.time_tracker.is_running() and
-            self.app not in app_names and
-            not self.logic.file_handler.get_continuing_tracker()
-        )
+    def _should_stop_tracking(self):
+        if not self.logic.time_tracker.is_running() or self.logic.file_handler.get_continuing_tracker():
+            return False
+        if self.exit_waiter is None or self.exit_waiter.exited():
+            # Resolve the app to its processes once, and again once they have all
+            # exited in case the app was restarted in the meantime
+            self._close_exit_waiter()
+            self.exit_waiter = self.logic.app_tracker.exit_waiter(self.app)
+            self.logic.resource_sampler.track(self.exit_waiter.pids)
+            self.logic.focus_tracker.track(self.exit_waiter.pids)
+        return self.exit_waiter.exited()
+
+    def _close_exit_waiter(self):
+        if self.exit_waiter is not None:
+            self.exit_waiter.close()
+            self.exit_waiter = None
 
     def _start_tracking(self):
         self.logic.time_tracker.start()
-        self.logic.time_tracker.clock()
+        self.logic.checkpointer.start()
         self.logic.mouse_tracker.start()
         self.update_queue.put((self.APP_UPDATE, self.app))
 
     def _stop_tracking(self):
         self.logic.time_tracker.resume()
         self.logic.time_tracker.stop()
+        self.logic.checkpointer.checkpoint()
         self.logic.mouse_tracker.stop()
         self.rec_time = 0
         self.app = ""
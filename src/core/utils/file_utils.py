@@ -1,10 +1,81 @@
 import os
+import _pickle
 import hashlib
 import pickle
+import stat
+import struct
+import tempfile
+import threading
+import time
+import zlib
+from contextlib import contextmanager
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Session files are a fixed header followed by a single pickled payload:
+# magic, format version, generation, payload length, SHA256 digest of the payload.
+# The generation (0 in files written before it was kept) counts the rewrites that
+# folded the capture journal and resource file in, see session_generation().
+# From v4 a fixed-size summary block sits between the header and the payload, so
+# list views can read app name, times and run count without decoding the payload:
+# time_spent, first start, last stop, run count, app name, created date, CRC32.
+# Older files (v1/v2) store a pickle of the pickled session data, with the hash
+# in a separate .hash file.
+SESSION_MAGIC = b"AUGS"
+SESSION_FORMAT_VERSION = 4
+SESSION_HEADER = struct.Struct("<4sHHQ32s")
+SESSION_SUMMARY = struct.Struct("<dddI128s32sI")
+
+# Capture journals (.journal) hold the start, stop, pause and focus events of a session
+# recorded since its .dat file was last written, as fixed-size records:
+# kind, two values and a CRC32 of the preceding bytes. New journals start with a
+# JOURNAL_BEGIN record, journals written before without one belong to generation 0.
+JOURNAL_RECORD = struct.Struct("<BddI")
+JOURNAL_START = 1
+JOURNAL_STOP = 2
+JOURNAL_PAUSE = 3  # values: pause start, pause length
+JOURNAL_TOTAL = 4  # value: session time_spent
+JOURNAL_FOCUS = 5  # values: focus start, focus length
+JOURNAL_IDLE_PAUSE = 6  # values: pause start, pause length
+JOURNAL_SUSPEND_PAUSE = 7  # values: pause start, pause length
+JOURNAL_BEGIN = 8  # value: generation of the session file the journal adds to
+
+# Why a session was paused, the "reason" of its pause captures. Pauses saved
+# without a reason are manual ones
+PAUSE_MANUAL = "manual"  # by the user
+PAUSE_IDLE = "idle"  # no input for the idle time limit, starting at the last input
+PAUSE_SUSPEND = "suspend"  # the system was suspended
+PAUSE_JOURNAL_KINDS = {
+    PAUSE_MANUAL: JOURNAL_PAUSE,
+    PAUSE_IDLE: JOURNAL_IDLE_PAUSE,
+    PAUSE_SUSPEND: JOURNAL_SUSPEND_PAUSE,
+}
+JOURNAL_PAUSE_REASONS = {kind: reason for reason, kind in PAUSE_JOURNAL_KINDS.items()}
+
+# Usage files (Usage/<date>.dat) hold the intervals the background recorder saw
+# each app running or in the foreground on one day, as appended records: a name
+# record ("N", app id, name length, UTF-8 name) the first time an app appears in
+# the file, then interval records ("I", app id, kind, unix start, duration), both
+# in whole seconds. Intervals are split at midnight.
+USAGE_NAME = struct.Struct("<cHB")
+USAGE_INTERVAL = struct.Struct("<cHBII")
+USAGE_RUNNING = 0
+USAGE_FOREGROUND = 1
+
+# Resource files (.resources) hold the resource usage buckets a continued session
+# sampled since its .dat file was last written, appended on each incremental save
+# like the capture journal: the seven bucket values and a CRC32 of the preceding bytes.
+# Like a journal, a new resource file starts with a record giving the generation of
+# the session file it adds to: a RESOURCE_BEGIN start time and the generation as duration
+RESOURCE_RECORD = struct.Struct("<7dI")
+RESOURCE_BEGIN = -1.0
+
+# When the SHA256 checksum of a session file is verified on load
+VERIFY_EAGER = "eager"  # every load
+VERIFY_FIRST_TOUCH = "first_touch"  # first load of each unchanged file
+VERIFY_BACKGROUND = "background"  # first touch, and a scrub of all files after startup
+
 def get_sessions_directory():
     """Define the sessions directory, which stores application usage data"""
     if os.name == 'nt':  # Windows
@@ -25,6 +96,16 @@ def get_projects_directory():
         projects_dir = os.path.join(home_dir, '.local/share/AppUsageGUI/Projects')
     return projects_dir
 
+def get_usage_directory():
+    """Define the usage directory, which stores the background recorder's daily usage files"""
+    if os.name == 'nt':  # Windows
+        appdata_dir = str(os.getenv('APPDATA'))
+        usage_dir = os.path.join(appdata_dir, 'AppUsageGUI', 'Usage')
+    else:  # macOS and Linux
+        home_dir = os.path.expanduser('~')
+        usage_dir = os.path.join(home_dir, '.local/share/AppUsageGUI/Usage')
+    return usage_dir
+
 def get_user_directory():
     """Define the user directory, which stores presets and settings"""
     if os.name == 'nt':  # Windows
@@ -47,6 +128,18 @@ def lock_file():
     """Returns the path to the lock file"""
     return os.path.join(get_user_directory(), 'AppUsageGui.lock')
 
+def catalog_file():
+    """Returns the path to the session catalog file"""
+    return os.path.join(get_user_directory(), 'sessions_catalog.dat')
+
+def verified_file():
+    """Returns the path to the file of already verified sessions"""
+    return os.path.join(get_user_directory(), 'verified_sessions.dat')
+
+def recovery_file():
+    """Returns the path to the checkpoint of the session being tracked"""
+    return os.path.join(get_user_directory(), 'recovery.dat')
+
 def sessions_exist(p=False):
     """Check if sessions exist in either old sessions directory or any project directory.
     Set p=True to print directory paths"""
@@ -146,20 +239,114 @@ def get_projects():
                 projects_list.append(item)
     return projects_list
 
-def get_session_project(session_filename):
-    """Determine which project a session belongs to, or None if it's a standalone session"""
-    projects_dir = get_projects_directory()
+def session_directories():
+    """Returns every existing directory sessions are stored in: the sessions
+    directory and each project directory"""
+    directories = [get_sessions_directory()]
+    directories += [os.path.join(get_projects_directory(), p) for p in get_projects()]
+    return [d for d in directories if os.path.isdir(d)]
 
-    if os.path.exists(projects_dir):
-        for project_name in os.listdir(projects_dir):
-            project_path = os.path.join(projects_dir, project_name)
-            if os.path.isdir(project_path):
-                session_path = os.path.join(project_path, session_filename)
-                if os.path.exists(session_path):
-                    return project_name
+class _SessionIndex:
+    """In-memory map of session name to the project(s) storing a session of that name.
+    Built from one os.scandir pass over the session directories, kept current by
+    index_session/unindex_session, and rebuilt when a session directory's mtime
+    shows it changed some other way. The mtimes are rechecked at most every
+    REVALIDATE_SECONDS, so lookups are O(1)"""
+    REVALIDATE_SECONDS = 2.0
 
-    # If not found in any project, it's a standalone session
-    return None
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.projects = {}  # session name -> set of projects, None for standalone
+        self.signature = None  # session directory -> mtime_ns
+        self.validated_at = None
+
+    def _scan_signature(self):
+        signature = {}
+        for directory in session_directories():
+            try:
+                signature[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                pass
+        return signature
+
+    def _rebuild(self, signature):
+        projects = {}
+        sessions_dir = get_sessions_directory()
+        for directory in signature:
+            project = None if directory == sessions_dir else os.path.basename(directory)
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.name.endswith(".dat"):
+                        projects.setdefault(entry.name[:-4], set()).add(project)
+        self.projects = projects
+        self.signature = signature
+
+    def _validate(self):
+        now = time.monotonic()
+        if self.validated_at is not None and now - self.validated_at < self.REVALIDATE_SECONDS:
+            return
+        signature = self._scan_signature()
+        if signature != self.signature:
+            self._rebuild(signature)
+        self.validated_at = now
+
+    def _touch(self, project):
+        directory = os.path.join(get_projects_directory(), project) if project else get_sessions_directory()
+        if self.signature is not None:
+            try:
+                self.signature[directory] = os.stat(directory).st_mtime_ns
+            except OSError:
+                self.signature.pop(directory, None)
+
+    def lookup(self, name):
+        with self.lock:
+            self._validate()
+            projects = self.projects.get(name)
+        if not projects:
+            return None
+        # Sessions stored in a project win over standalone sessions of the same name
+        named = sorted(p for p in projects if p is not None)
+        return named[0] if named else None
+
+    def add(self, name, project):
+        with self.lock:
+            if self.signature is None:
+                return  # built on first lookup
+            self.projects.setdefault(name, set()).add(project)
+            self._touch(project)
+
+    def remove(self, name, project):
+        with self.lock:
+            if self.signature is None:
+                return
+            projects = self.projects.get(name)
+            if projects is not None:
+                projects.discard(project)
+                if not projects:
+                    del self.projects[name]
+            self._touch(project)
+
+_session_index = _SessionIndex()
+
+def index_session(name, project=None):
+    """Record a session saved to a project (None for standalone) in the session index"""
+    _session_index.add(name, project)
+
+def unindex_session(name, project=None):
+    """Remove a deleted or moved session from the session index"""
+    _session_index.remove(name, project)
+
+def invalidate_session_index():
+    """Force the session index to be rebuilt, e.g. after a whole project was removed"""
+    with _session_index.lock:
+        _session_index.signature = None
+        _session_index.validated_at = None
+
+def get_session_project(session_filename):
+    """Determine which project a session belongs to, or None if it's a standalone session"""
+    if session_filename.endswith(".dat"):
+        session_filename = session_filename[:-4]
+    return _session_index.lookup(session_filename)
 
 
 def name_from_exe(exename):
@@ -183,11 +370,691 @@ def read_file(file_path):
         return pickle.load(f)
 
 def write_file(file_path, data):
-    """Serialize and write data to a .dat file"""
-    with open(file_path, 'wb') as f:
-        f.truncate(0)
+    """Serialize and atomically write data to a .dat file"""
+    with atomic_open(file_path) as f:
         pickle.dump(data, f)
 
+_batch_state = threading.local()
+
+def _sync_directory(directory):
+    """Flush a directory entry change (a rename) to disk. Not possible on Windows"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+def _commit(tmp_path, file_path, fsync_dir):
+    os.replace(tmp_path, file_path)
+    if fsync_dir:
+        _sync_directory(os.path.dirname(file_path) or '.')
+
+@contextmanager
+def atomic_open(file_path, mode='wb', fsync_dir=True):
+    """Open a temporary file next to file_path for writing. When the block exits
+    without an error, the file is fsynced and renamed over file_path, so readers
+    and crashes only ever see the old or the complete new contents.
+    Set fsync_dir=False to skip flushing the directory entry after the rename.
+    Inside atomic_batch() the rename is deferred until the batch ends"""
+    directory = os.path.dirname(file_path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_path) + '.', suffix='.tmp')
+    batch = getattr(_batch_state, 'pending', None)
+    try:
+        try:
+            os.chmod(tmp_path, stat.S_IMODE(os.stat(file_path).st_mode))
+        except OSError:
+            os.chmod(tmp_path, 0o644)
+        with os.fdopen(fd, mode) as f:
+            yield f
+            f.flush()
+            if batch is None or os.name == 'nt':
+                os.fsync(f.fileno())
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    if batch is None:
+        _commit(tmp_path, file_path, fsync_dir)
+    else:
+        batch.append((tmp_path, file_path, fsync_dir))
+
+@contextmanager
+def atomic_batch():
+    """Group many atomic writes made by this thread, for bulk operations.
+    Files are written to temporary files as usual, but flushed to disk and renamed
+    into place only when the batch ends, so the kernel can write them back
+    together, and each directory is synced once instead of once per file. Writes
+    become visible when the batch ends. If the block raises, none of its writes
+    are applied"""
+    if getattr(_batch_state, 'pending', None) is not None:
+        # Nested batches join the outer one
+        yield
+        return
+    _batch_state.pending = pending = []
+    try:
+        yield
+    except BaseException:
+        for tmp_path, _, _ in pending:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+        raise
+    finally:
+        _batch_state.pending = None
+
+    if not pending:
+        return
+    if os.name != 'nt':
+        # Only the batch's own files, Windows fsyncs each file when it is written
+        for tmp_path, _, _ in pending:
+            fd = os.open(tmp_path, os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+    directories = set()
+    for tmp_path, file_path, fsync_dir in pending:
+        os.replace(tmp_path, file_path)
+        if fsync_dir:
+            directories.add(os.path.dirname(file_path) or '.')
+    for directory in directories:
+        _sync_directory(directory)
+
+def session_directory(project_name=None):
+    """Returns the directory a session is stored in"""
+    if project_name:
+        return os.path.join(get_projects_directory(), project_name)
+    return get_sessions_directory()
+
+class _HashingWriter:
+    """File wrapper that hashes and counts bytes as they are written"""
+    def __init__(self, f):
+        self.f = f
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.f.write(data)
+
+def summarize_session(data):
+    """Returns the summary of session data that list views need"""
+    captures = data.get("time_captures", {}) if isinstance(data, dict) else {}
+    starts = captures.get("starts", [])
+    stops = captures.get("stops", [])
+    return {
+        "app_name": data.get("app_name", "Unknown"),
+        "time_spent": data.get("time_spent", 0.0),
+        "created_date": data.get("created_date", "Unknown"),
+        "first_started": starts[0] if starts else 0.0,
+        "last_stopped": stops[-1] if stops else 0.0,
+        "run_count": len(starts),
+    }
+
+def _pack_summary(summary):
+    app_name = str(summary["app_name"]).encode("utf-8")[:128].decode("utf-8", "ignore").encode("utf-8")
+    created_date = str(summary["created_date"]).encode("utf-8")[:32]
+    body = SESSION_SUMMARY.pack(
+        float(summary["time_spent"] or 0.0), summary["first_started"], summary["last_stopped"],
+        summary["run_count"], app_name, created_date, 0,
+    )[:-4]
+    return body + struct.pack("<I", zlib.crc32(body))
+
+def _unpack_summary(blob):
+    """Decode a summary block. Returns None if it is damaged"""
+    time_spent, first_started, last_stopped, run_count, app_name, created_date, crc = SESSION_SUMMARY.unpack_from(blob)
+    if zlib.crc32(blob[:SESSION_SUMMARY.size - 4]) != crc:
+        return None
+    return {
+        "app_name": app_name.rstrip(b"\0").decode("utf-8", "replace"),
+        "time_spent": time_spent,
+        "created_date": created_date.rstrip(b"\0").decode("utf-8", "replace"),
+        "first_started": first_started,
+        "last_stopped": last_stopped,
+        "run_count": run_count,
+    }
+
+def write_session_file(file_path, data):
+    """Atomically serialize session data into a session file with its summary block,
+    hashing the payload while it is written. The data must include the events of
+    the session's capture journal and resource file: the file gets the next
+    generation, which leaves both behind. Returns the payload size in bytes"""
+    generation = (session_generation(file_path) + 1) % 0x10000
+    with atomic_open(file_path) as f:
+        f.write(bytes(SESSION_HEADER.size))
+        f.write(_pack_summary(summarize_session(data)))
+        writer = _HashingWriter(f)
+        pickle.dump(data, writer, protocol=pickle.HIGHEST_PROTOCOL)
+        f.seek(0)
+        f.write(SESSION_HEADER.pack(SESSION_MAGIC, SESSION_FORMAT_VERSION, generation,
+                                    writer.size, writer.sha256.digest()))
+    if getattr(_batch_state, 'pending', None) is None:
+        # The checksum was computed from the data just written, no need to verify it again
+        _verified_hashes.mark(file_path, _file_identity(os.stat(file_path)), writer.sha256.digest())
+    return writer.size
+
+def _session_payload(blob, trusted_digest=None):
+    """Verify the contents of a v3+ session file. Returns (payload, error)
+    The checksum is not recomputed if it equals trusted_digest"""
+    if len(blob) < SESSION_HEADER.size:
+        return None, "Data is corrupt"
+    _, version, _, length, digest = SESSION_HEADER.unpack_from(blob)
+    if version > SESSION_FORMAT_VERSION:
+        return None, f"Unsupported session format v{version}"
+    offset = SESSION_HEADER.size
+    if version >= 4:
+        offset += SESSION_SUMMARY.size
+    payload = memoryview(blob)[offset:]
+    if len(payload) != length:
+        return None, "Hash mismatch"
+    if digest != trusted_digest and hashlib.sha256(payload).digest() != digest:
+        return None, "Hash mismatch"
+    return payload, None
+
+def _legacy_session_payload(blob, hash_path):
+    """Verify the contents of a v1/v2 session file. Returns (payload, error)"""
+    if not os.path.exists(hash_path):
+        return None, "No hash file found"
+    try:
+        data = pickle.loads(blob)
+    except Exception:
+        # A damaged pickle fails in many ways, e.g. OverflowError or MemoryError
+        return None, "Data is corrupt"
+    stored_hash = read_file(hash_path).decode("utf-8")
+    if compute_hash(data) != stored_hash:
+        return None, "Hash mismatch"
+    return data, None
+
+def _file_identity(st):
+    # ctime is included since, unlike mtime, it cannot be set back by other programs
+    return st.st_size, st.st_mtime_ns, st.st_ino, st.st_ctime_ns
+
+class _VerifiedHashes:
+    """Session files whose checksum has already been verified, so unchanged files
+    are not hashed again. A file is identified by (path, size, mtime_ns, inode,
+    ctime_ns) and its header digest: rewriting or replacing it changes the identity and it
+    is verified again. Kept in memory, and in verified_file() when persisted"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.mode = VERIFY_FIRST_TOUCH
+        self.persist = False
+        self.loaded = False
+        self.dirty = False
+        self.entries = {}  # path -> file identity + (digest,)
+
+    def configure(self, mode, persist):
+        with self.lock:
+            self.mode = mode
+            self.persist = persist
+            if persist and not self.loaded:
+                self._load()
+        if not persist and os.path.exists(verified_file()):
+            try:
+                os.remove(verified_file())
+            except OSError as e:
+                logger.warning(f"Could not remove verified sessions file: {e}")
+
+    def _load(self):
+        """Merge the persisted entries of files that are still unchanged"""
+        self.loaded = True
+        try:
+            entries = read_file(verified_file())
+        except FileNotFoundError:
+            return
+        except Exception as e:
+            logger.warning(f"Could not read verified sessions file: {e}")
+            return
+        for path, entry in entries.items():
+            try:
+                if _file_identity(os.stat(path)) == entry[:-1]:
+                    self.entries.setdefault(path, entry)
+            except OSError:
+                pass
+
+    def lookup(self, path, identity):
+        """Returns the verified digest of the file, or None if it must be verified"""
+        with self.lock:
+            if self.mode == VERIFY_EAGER:
+                return None
+            entry = self.entries.get(path)
+        if entry is None or entry[:-1] != identity:
+            return None
+        return entry[-1]
+
+    def mark(self, path, identity, digest):
+        entry = identity + (digest,)
+        with self.lock:
+            if self.entries.get(path) != entry:
+                self.entries[path] = entry
+                self.dirty = True
+
+    def save(self):
+        with self.lock:
+            if not self.persist or not self.dirty:
+                return
+            entries = dict(self.entries)
+            self.dirty = False
+        user_dir_exists()
+        try:
+            write_file(verified_file(), entries)
+        except OSError as e:
+            logger.warning(f"Could not write verified sessions file: {e}")
+
+_verified_hashes = _VerifiedHashes()
+
+def configure_session_verification(mode, persist=False):
+    """Choose when session checksums are verified (VERIFY_EAGER, VERIFY_FIRST_TOUCH
+    or VERIFY_BACKGROUND) and whether verified files are remembered between runs"""
+    _verified_hashes.configure(mode, persist)
+
+def save_verified_sessions():
+    """Persist the verified sessions, if enabled"""
+    _verified_hashes.save()
+
+def verify_session_file(file_path):
+    """Check the checksum of a v3+ session file without decoding it, reading the
+    payload in chunks. Files verified before are skipped. Returns an error or None"""
+    try:
+        with open(file_path, 'rb') as f:
+            identity = _file_identity(os.fstat(f.fileno()))
+            head = f.read(SESSION_HEADER.size)
+            if len(head) < SESSION_HEADER.size or head[:len(SESSION_MAGIC)] != SESSION_MAGIC:
+                return "Data is corrupt"
+            _, version, _, length, digest = SESSION_HEADER.unpack_from(head)
+            if version > SESSION_FORMAT_VERSION:
+                return f"Unsupported session format v{version}"
+            if _verified_hashes.lookup(file_path, identity) == digest:
+                return None
+            if version >= 4:
+                f.seek(SESSION_SUMMARY.size, os.SEEK_CUR)
+            sha256 = hashlib.sha256()
+            size = 0
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha256.update(chunk)
+                size += len(chunk)
+    except OSError:
+        return "No session file found"
+    if size != length or sha256.digest() != digest:
+        return "Hash mismatch"
+    _verified_hashes.mark(file_path, identity, digest)
+    return None
+
+def scrub_sessions(stop_event=None):
+    """Verify every session file not verified yet, for VERIFY_BACKGROUND.
+    Stops early when stop_event is set. Returns a list of (filename, error)"""
+    failed = []
+    for directory in session_directories():
+        with os.scandir(directory) as entries:
+            names = [e.name for e in entries if e.name.endswith(".dat")]
+        for file in names:
+            if stop_event is not None and stop_event.is_set():
+                return failed
+            file_path = os.path.join(directory, file)
+            if is_legacy_session(file_path):
+                error = read_session(directory, file[:-4])[1]
+            else:
+                error = verify_session_file(file_path)
+            if error is not None:
+                failed.append((file[:-4], error))
+    _verified_hashes.save()
+    return failed
+
+def read_session_payload(directory, filename):
+    """Read a session file of any format version and check its integrity, without
+    decoding it. Returns (payload, error); decode the payload with decode_session()"""
+    file_path = os.path.join(directory, filename + ".dat")
+    hash_path = os.path.join(directory, filename + ".hash")
+
+    if not os.path.exists(file_path):
+        return None, "No session file found"
+    try:
+        with open(file_path, 'rb') as f:
+            identity = _file_identity(os.fstat(f.fileno()))
+            blob = f.read()
+        if blob[:len(SESSION_MAGIC)] != SESSION_MAGIC:
+            return _legacy_session_payload(blob, hash_path)
+        payload, error = _session_payload(blob, _verified_hashes.lookup(file_path, identity))
+        if error is None:
+            _verified_hashes.mark(file_path, identity, SESSION_HEADER.unpack_from(blob)[4])
+        return payload, error
+    except (_pickle.UnpicklingError, EOFError, ValueError, struct.error):
+        return None, "Data is corrupt"
+
+def decode_session(directory, filename, payload):
+    """Decode a payload from read_session_payload() and merge in the events of the
+    session's capture journal. Returns (data, error)"""
+    try:
+        data = pickle.loads(payload)
+    except Exception:
+        # A damaged pickle fails in many ways, e.g. OverflowError or MemoryError
+        return None, "Data is corrupt"
+    generation = session_generation(os.path.join(directory, filename + ".dat"))
+    data = apply_journal(data, read_journal(os.path.join(directory, filename + ".journal"), generation))
+    buckets = read_resource_buckets(os.path.join(directory, filename + ".resources"), generation)
+    return apply_resource_buckets(data, buckets), None
+
+def read_session(directory, filename):
+    """Read a session of any format version and check its integrity without any
+    other side effects. Events from its capture journal are merged in.
+    Returns (data, error), error being None when the session loaded correctly"""
+    payload, error = read_session_payload(directory, filename)
+    if error is not None:
+        return None, error
+    return decode_session(directory, filename, payload)
+
+def read_session_summary(directory, filename):
+    """Read only the summary block of a session: app_name, time_spent, created_date,
+    first_started, last_stopped and run_count, with capture journal events applied.
+    The payload is neither read nor verified. Sessions older than v4 have no summary
+    block and are read in full. Returns (summary, error)"""
+    file_path = os.path.join(directory, filename + ".dat")
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(SESSION_HEADER.size + SESSION_SUMMARY.size)
+    except OSError:
+        return None, "No session file found"
+
+    summary = None
+    if len(head) == SESSION_HEADER.size + SESSION_SUMMARY.size and head[:len(SESSION_MAGIC)] == SESSION_MAGIC:
+        _, version, generation, _, _ = SESSION_HEADER.unpack_from(head)
+        if version > SESSION_FORMAT_VERSION:
+            return None, f"Unsupported session format v{version}"
+        if version >= 4:
+            summary = _unpack_summary(head[SESSION_HEADER.size:])
+            if summary is None:
+                return None, "Data is corrupt"
+
+    if summary is None:
+        data, error = read_session(directory, filename)
+        if error is not None:
+            return None, error
+        return summarize_session(data), None
+
+    for kind, a, b in read_journal(os.path.join(directory, filename + ".journal"), generation):
+        if kind == JOURNAL_START:
+            summary["run_count"] += 1
+            if not summary["first_started"]:
+                summary["first_started"] = a
+        elif kind == JOURNAL_STOP:
+            summary["last_stopped"] = a
+        elif kind == JOURNAL_TOTAL:
+            summary["time_spent"] = a
+    return summary, None
+
+def pack_journal_record(kind, a, b=0.0):
+    """Encode one capture journal record"""
+    body = JOURNAL_RECORD.pack(kind, a, b, 0)[:-4]
+    return body + struct.pack("<I", zlib.crc32(body))
+
+def session_generation(file_path):
+    """The generation of a session file, bumped by every rewrite of it. A rewrite
+    folds in the capture journal and resource file, which are removed after it.
+    Both record the generation they add to, so if a crash leaves them behind they
+    are known to be folded in already and are not applied twice.
+    0 for missing and pre-v3 files"""
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(SESSION_HEADER.size)
+    except FileNotFoundError:
+        return 0
+    if len(head) < SESSION_HEADER.size or head[:len(SESSION_MAGIC)] != SESSION_MAGIC:
+        return 0
+    return SESSION_HEADER.unpack_from(head)[2]
+
+def _sidecar_generation(file_path, record, begin):
+    """The generation recorded by the first record of a capture journal or resource
+    file, None if the file is missing or empty"""
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(record.size)
+    except FileNotFoundError:
+        return None
+    if len(head) < record.size:
+        return None
+    return begin(record.unpack_from(head))
+
+def _journal_begin(record):
+    kind, a, _, _ = record
+    return int(a) if kind == JOURNAL_BEGIN else 0
+
+def _resources_begin(record):
+    return int(record[1]) if record[0] == RESOURCE_BEGIN else 0
+
+def discard_stale_sidecars(directory, filename):
+    """Remove the capture journal and resource file of a session if they were
+    already folded into its session file, left behind by a crash during a save.
+    Returns the generation of the session file, for appending to them"""
+    generation = session_generation(os.path.join(directory, filename + ".dat"))
+    for extension, record, begin in ((".journal", JOURNAL_RECORD, _journal_begin),
+                                     (".resources", RESOURCE_RECORD, _resources_begin)):
+        path = os.path.join(directory, filename + extension)
+        stale = _sidecar_generation(path, record, begin)
+        if stale is not None and stale != generation:
+            logger.info(f"Removing {path}, it was already folded into its session file")
+            os.remove(path)
+    return generation
+
+def append_journal(journal_path, records, generation=0):
+    """Append encoded records to a capture journal and flush them to disk. A new
+    journal starts with a record of the generation of its session file"""
+    with open(journal_path, 'ab') as f:
+        if f.tell() == 0:
+            records = [pack_journal_record(JOURNAL_BEGIN, generation)] + list(records)
+        f.write(b"".join(records))
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_journal(journal_path, generation=0):
+    """Read the records of a capture journal that adds to the given generation of
+    its session file as (kind, a, b) tuples, none if it is of another generation.
+    Reading stops at the first torn or damaged record, so a crash mid-append
+    only loses the event being written"""
+    records = []
+    if not os.path.exists(journal_path):
+        return records
+    with open(journal_path, 'rb') as f:
+        blob = f.read()
+    for offset in range(0, len(blob) - JOURNAL_RECORD.size + 1, JOURNAL_RECORD.size):
+        kind, a, b, crc = JOURNAL_RECORD.unpack_from(blob, offset)
+        if zlib.crc32(blob[offset:offset + JOURNAL_RECORD.size - 4]) != crc:
+            logger.warning(f"Capture journal {journal_path} is damaged after {len(records)} records")
+            break
+        records.append((kind, a, b))
+    begin = 0
+    if records and records[0][0] == JOURNAL_BEGIN:
+        begin = int(records.pop(0)[1])
+    if begin != generation:
+        logger.info(f"Ignoring capture journal {journal_path}, it was already folded into its session file")
+        return []
+    return records
+
+def usage_file(day):
+    """Returns the path to the usage file of a date"""
+    return os.path.join(get_usage_directory(), day.isoformat() + '.dat')
+
+def read_usage_file(file_path):
+    """Read a usage file. Returns (names, intervals, end): the app names by id,
+    (app name, kind, start, duration) tuples and the offset just past the last valid
+    record. Reading stops at a torn record"""
+    names = []
+    intervals = []
+    if not os.path.exists(file_path):
+        return names, intervals, 0
+    with open(file_path, 'rb') as f:
+        blob = f.read()
+    offset = 0
+    while offset < len(blob):
+        tag = blob[offset:offset + 1]
+        if tag == b"N" and offset + USAGE_NAME.size <= len(blob):
+            _, app_id, length = USAGE_NAME.unpack_from(blob, offset)
+            end = offset + USAGE_NAME.size + length
+            if end > len(blob) or app_id != len(names):
+                break
+            names.append(blob[offset + USAGE_NAME.size:end].decode("utf-8", "replace"))
+            offset = end
+        elif tag == b"I" and offset + USAGE_INTERVAL.size <= len(blob):
+            _, app_id, kind, start, duration = USAGE_INTERVAL.unpack_from(blob, offset)
+            if app_id >= len(names):
+                break
+            intervals.append((names[app_id], kind, start, duration))
+            offset += USAGE_INTERVAL.size
+        else:
+            break
+    if offset < len(blob):
+        logger.warning(f"Usage file {file_path} is damaged after {len(intervals)} intervals")
+    return names, intervals, offset
+
+def append_usage_intervals(file_path, names, intervals):
+    """Append (app name, kind, start, duration) intervals to a usage file in one
+    write. names is the list of app names already in the file, as returned by
+    read_usage_file(), and is extended with the new ones. The file must end with a
+    whole record, see truncate_usage_file()"""
+    ids = {name: app_id for app_id, name in enumerate(names)}
+    records = []
+    for app_name, kind, start, duration in intervals:
+        app_name = app_name.encode("utf-8")[:255].decode("utf-8", "ignore")  # as it reads back
+        encoded = app_name.encode("utf-8")
+        if app_name not in ids:
+            ids[app_name] = len(names)
+            names.append(app_name)
+            records.append(USAGE_NAME.pack(b"N", ids[app_name], len(encoded)) + encoded)
+        records.append(USAGE_INTERVAL.pack(b"I", ids[app_name], kind, int(start), int(duration)))
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, 'ab') as f:
+        f.write(b"".join(records))
+        f.flush()
+        os.fsync(f.fileno())
+
+def truncate_usage_file(file_path, end):
+    """Cut a torn record off the end of a usage file, at the end offset returned by
+    read_usage_file(), so appended records are not read as part of it"""
+    if os.path.exists(file_path) and os.path.getsize(file_path) > end:
+        logger.info(f"Truncating torn record of usage file {file_path}")
+        os.truncate(file_path, end)
+
+def append_resource_buckets(resources_path, buckets, generation=0):
+    """Append resource usage buckets to a resource file and flush them to disk.
+    A new resource file starts with a record of the generation of its session file"""
+    def pack(bucket):
+        body = RESOURCE_RECORD.pack(*bucket, 0)[:-4]
+        return body + struct.pack("<I", zlib.crc32(body))
+
+    with open(resources_path, 'ab') as f:
+        records = [pack(bucket) for bucket in buckets]
+        if f.tell() == 0:
+            records.insert(0, pack((RESOURCE_BEGIN, generation, 0.0, 0.0, 0.0, 0.0, 0.0)))
+        f.write(b"".join(records))
+        f.flush()
+        os.fsync(f.fileno())
+
+def read_resource_buckets(resources_path, generation=0):
+    """Read the buckets of a resource file that adds to the given generation of its
+    session file, none if it is of another generation. Reading stops at the first
+    torn or damaged record"""
+    buckets = []
+    if not os.path.exists(resources_path):
+        return buckets
+    with open(resources_path, 'rb') as f:
+        blob = f.read()
+    for offset in range(0, len(blob) - RESOURCE_RECORD.size + 1, RESOURCE_RECORD.size):
+        *bucket, crc = RESOURCE_RECORD.unpack_from(blob, offset)
+        if zlib.crc32(blob[offset:offset + RESOURCE_RECORD.size - 4]) != crc:
+            logger.warning(f"Resource file {resources_path} is damaged after {len(buckets)} records")
+            break
+        buckets.append(tuple(bucket))
+    begin = 0
+    if buckets and buckets[0][0] == RESOURCE_BEGIN:
+        begin = int(buckets.pop(0)[1])
+    if begin != generation:
+        logger.info(f"Ignoring resource file {resources_path}, it was already folded into its session file")
+        return []
+    return buckets
+
+def apply_resource_buckets(data, buckets):
+    """Append the buckets of a resource file to the resource usage of loaded session
+    data. The series may then exceed its capacity until it is sampled again"""
+    if not buckets or not isinstance(data, dict):
+        return data
+    usage = data.get("resource_usage") or {"stride": 1, "buckets": []}
+    data["resource_usage"] = dict(usage, buckets=list(usage.get("buckets", [])) + buckets)
+    return data
+
+def apply_journal(data, records):
+    """Merge capture journal records into loaded session data"""
+    if not records or not isinstance(data, dict):
+        return data
+    captures = data.setdefault("time_captures", {"starts": [], "stops": [], "pauses": []})
+    for kind, a, b in records:
+        if kind == JOURNAL_START:
+            captures["starts"].append(a)
+        elif kind == JOURNAL_STOP:
+            captures["stops"].append(a)
+        elif kind in JOURNAL_PAUSE_REASONS:
+            captures["pauses"].append({"start": a, "how_long": b, "reason": JOURNAL_PAUSE_REASONS[kind]})
+        elif kind == JOURNAL_FOCUS:
+            captures.setdefault("focus", []).append({"start": a, "how_long": b})
+        elif kind == JOURNAL_TOTAL:
+            data["time_spent"] = a
+    return data
+
+def is_legacy_session(file_path):
+    """Check if a session file predates the v3 format"""
+    with open(file_path, 'rb') as f:
+        return f.read(len(SESSION_MAGIC)) != SESSION_MAGIC
+
+def session_format_version(file_path):
+    """Returns the format version of a session file, 2 for v1/v2 files"""
+    with open(file_path, 'rb') as f:
+        head = f.read(SESSION_HEADER.size)
+    if head[:len(SESSION_MAGIC)] != SESSION_MAGIC or len(head) < SESSION_HEADER.size:
+        return 2
+    return SESSION_HEADER.unpack_from(head)[1]
+
+def migrate_sessions():
+    """Rewrite every session file older than the current format, removing the .hash
+    file of v1/v2 sessions. Sessions that fail to load or write are left untouched,
+    without affecting the others. Returns (migrated, failed) where failed is a list of (filename, error)"""
+    migrated = 0
+    failed = []
+    for directory in session_directories():
+        migrated_files = []
+        with atomic_batch():
+            for file in os.listdir(directory):
+                if not file.endswith(".dat"):
+                    continue
+                file_path = os.path.join(directory, file)
+                if session_format_version(file_path) >= SESSION_FORMAT_VERSION:
+                    continue
+                filename = file[:-4]
+                try:
+                    data, error = read_session(directory, filename)
+                    if error is None:
+                        write_session_file(file_path, data)
+                except Exception as e:
+                    error = f"Could not migrate session: {e}"
+                if error is not None:
+                    failed.append((filename, error))
+                    continue
+                migrated_files.append(filename)
+
+        # Only remove the old files once the new ones are in place
+        for filename in migrated_files:
+            for extension in (".hash", ".journal", ".resources"):
+                old_path = os.path.join(directory, filename + extension)
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+        migrated += len(migrated_files)
+
+    if migrated or failed:
+        logger.info(f"Migrated {migrated} session(s) to format v{SESSION_FORMAT_VERSION}, {len(failed)} failed")
+    return migrated, failed
+
 def calc_runtime(data, start_pos):
     """Calculate the runtime of a single run in seconds from time captures.
     Returns None if the data is invalid"""
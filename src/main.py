@@ -22,6 +22,7 @@ import tkinter.font as tkfont
 import os
 import sys
 import platform
+import multiprocessing
 from darkdetect import isDark
 
 from core.screens.splash_screen import splash_screen
@@ -111,4 +112,6 @@ def main():
         messagebox.showerror("Error", error_message)
 
 if __name__ == "__main__":
+    # Needed for worker processes of the bulk session loader in frozen builds
+    multiprocessing.freeze_support()
     main()